@@ -29,4 +29,6 @@ else()
   foreach(image ${IMAGES})
     set(BUILD_ORDER_CONTENT "${BUILD_ORDER_CONTENT}\n  - ${image}")
   endforeach()
+  # none of the images depends on another one
+  set(BUILD_ORDER_CONTENT "${BUILD_ORDER_CONTENT}\nbuild_dependencies: {}")
 endif()
@@ -15,6 +15,8 @@ For example,
 A depends on B, C
 B depends on C
 The build order will be [C, B, A].
+The dependencies are written as well, so that independent targets can be built
+at the same time.
 '''
 
 def topo_sort(dependencies):
@@ -69,4 +71,5 @@ if __name__ == "__main__":
     dependencies = parse_dependency_args(args.params)
 
     with open(args.output, 'w', encoding='utf-8') as f:
-        yaml.dump({'build_order': topo_sort(dependencies)}, f, allow_unicode=True)
+        yaml.dump({'build_order': topo_sort(dependencies), 'build_dependencies': dependencies}, f,
+                  allow_unicode=True)
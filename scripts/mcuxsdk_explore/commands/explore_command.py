@@ -1,23 +1,20 @@
 # Copyright 2025 NXP
 # SPDX-License-Identifier: BSD-3-Clause
 
+import os
 import sys
 import pathlib
 import datetime
 import time
+import hashlib
 
 sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../loaders')
-import device as dl
-import board as bl
 import build_command as bcl
-import example as el
-import part as pl
-import core as cl
+import source as sl
+import data_loader as dl
 
+# The gui modules are imported when the GUI starts, queries run without Tk
 sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../gui')
-import view as guiv
-import model as guim
-import controller as guic
 
 sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../database')
 import database_sqlite as db_sql
@@ -46,8 +43,16 @@ VISUALIZATION_TYPES = [
     ],
     ]
 
+def file_fingerprint(file_path):
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as f_input:
+        file_hash = hashlib.sha1(f_input.read()).hexdigest()
+    return stat.st_mtime_ns, stat.st_size, file_hash
+
 class RunExplorer():
-    def __init__(self, manifest_root_path, core_root_path):
+    def __init__(self, manifest_root_path, core_root_path, refresh=False, gui=True):
+        self.manifest_root_path = manifest_root_path
+        self.core_root_path = core_root_path
 
         database_file_path = pathlib.Path(manifest_root_path, '../data/mcux_sqlite.db')
 
@@ -55,118 +60,38 @@ class RunExplorer():
         self.database_sql = db_sql.DataBaseSQL()
 
         if not self.database_sql.exist(database_file_path):
-            print('Loading data from repositories. Expected load time is 40 seconds.')
-
-            self.build_command_data = bcl.BuildCommandDataLoader(manifest_root_path, core_root_path)
-            build_command_data = self.build_command_data.load()
-            timestamp2 = time.time()
-            time_delta = str(datetime.timedelta(seconds=timestamp2 - timestamp1))
-            print(f'build commands load time: {time_delta}')
-
-            example_paths = []
-            for x in build_command_data:
-                example_paths.append(x[('example','path')])
-            example_paths = list(sorted(set(example_paths)))
-
-            self.device_data = dl.DeviceDataLoader(manifest_root_path, core_root_path)
-            device_data = self.device_data.load()
-            timestamp3 = time.time()
-            time_delta = str(datetime.timedelta(seconds=timestamp3 - timestamp2))
-            print(f'device data load time: {time_delta}')
-
-            self.board_data = bl.BoardDataLoader(manifest_root_path, core_root_path)
-            board_data = self.board_data.load()
-            timestamp4 = time.time()
-            time_delta = str(datetime.timedelta(seconds=timestamp4 - timestamp3))
-            print(f'board data load time: {time_delta}')
-
-            self.example_data = el.ExampleDataLoader(manifest_root_path, core_root_path)
-            example_data = self.example_data.load(example_paths)
-            timestamp5 = time.time()
-            time_delta = str(datetime.timedelta(seconds=timestamp5 - timestamp4))
-            print(f'example data load time: {time_delta}')
-
-            self.part_data = pl.PartDataLoader(manifest_root_path, core_root_path)
-            part_data = self.part_data.load()
-            timestamp6 = time.time()
-            time_delta = str(datetime.timedelta(seconds=timestamp6 - timestamp5))
-            print(f'part data load time: {time_delta}')
-
-            self.core_data = cl.CoreDataLoader(manifest_root_path, core_root_path)
-            core_data = self.core_data.load()
-            timestamp7 = time.time()
-            time_delta = str(datetime.timedelta(seconds=timestamp7 - timestamp6))
-            print(f'core data load time: {time_delta}')
-
-            self.database_sql.initialize_database(database_file_path)
-
-            cursor = self.database_sql.conn.cursor()
-            cursor.execute('BEGIN TRANSACTION')
-
-            for i, x in enumerate(build_command_data):
-                self.database_sql.load_build_command_row(
-                    idx = i,
-                    raw_build_command = x[('raw_build_command',)],
-                    example_path = x[('example','path')],
-                    board_name = x[('board','name')],
-                    device_name = x[('device','name')],
-                    toolchain = x[('toolchain',)],
-                    config = x[('config',)],
-                    sysbuild = x[('sysbuild',)],
-                    core_id = x[('core','id')],
-                    cursor = cursor)
-
-            for x in device_data:
-                self.database_sql.load_device_row(
-                    device_id = x[('device', 'id')],
-                    device_full_name = x[('device', 'full_name')],
-                    device_name = x[('device', 'name')],
-                    device_platform = x[('device', 'platform')],
-                    device_series = x[('device', 'series')],
-                    device_family = x[('device', 'family')],
-                    device_subfamily = x[('device', 'subfamily')],
-                    cursor = cursor)
-
-            for x in board_data:
-                self.database_sql.load_board_row(
-                    board_name = x[('board','name')],
-                    part_name = x[('part','name')],
-                    cursor = cursor)
-
-            for x in example_data:
-                self.database_sql.load_example_row(
-                    example_name = x[('example','name')],
-                    example_category = x[('example','category')],
-                    example_path = x[('example','path')],
-                    cursor = cursor)
-
-            for x in part_data:
-                self.database_sql.load_part_row(
-                    part_name = x[('part','name')],
-                    device_id = x[('device','id')],
-                    cursor = cursor)
-
-            for x in core_data:
-                self.database_sql.load_core_row(
-                    device_id = x[('device','id')],
-                    core_id = x[('core','id')],
-                    core_type = x[('core','type')],
-                    cursor = cursor)
-
-            cursor.execute('COMMIT')
-
-            self.database_sql.create_supertable()
-
+            self.build_database(database_file_path)
         else:
-            print(f'Connecting to existing database file: {database_file_path}')
-            print('For data refresh close application, delete '
-                   'database file and start application again.')
             self.database_sql.connect(database_file_path)
+            if not self.database_sql.has_supertable():
+                print(f'Database file {database_file_path} is incomplete, rebuilding it.')
+                self.database_sql.conn.close()
+                self.build_database(database_file_path)
+            elif self.database_sql.get_schema_version() != db_sql.SCHEMA_VERSION and refresh:
+                print(f'Database file {database_file_path} was created by another version, rebuilding it.')
+                self.database_sql.conn.close()
+                self.build_database(database_file_path)
+            elif refresh:
+                self.refresh_database()
+            else:
+                print(f'Connecting to existing database file: {database_file_path}')
+                print('For data refresh close application and start it again with --refresh.')
+                if self.database_sql.get_schema_version() != db_sql.SCHEMA_VERSION:
+                    # Databases built before super_table was indexed
+                    self.database_sql.upgrade_supertable()
+
+        if gui:
+            self.start_gui(timestamp1)
+
+    def start_gui(self, timestamp1):
+        import view as guiv
+        import model as guim
+        import controller as guic
 
         self.model = guim.GuiModel(self.database_sql, VISUALIZATION_TYPES)
         self.view = guiv.GuiView(self.model, VISUALIZATION_TYPES)
 
-        img_path = pathlib.Path(core_root_path, 'scripts/mcuxsdk_explore/resources/nxp.png')
+        img_path = pathlib.Path(self.core_root_path, 'scripts/mcuxsdk_explore/resources/nxp.png')
         self.view.register_favicon(img_path)
         self.controller = guic.GuiController(self.model, self.view)
 
@@ -175,6 +100,242 @@ class RunExplorer():
 
         self.view.start_mainloop()
 
+    def source_path(self, filepath):
+        return dl.source_path(filepath, self.core_root_path)
+
+    def load_table_rows(self, table, records, cursor):
+        '''
+        Insert the records of table, return the super_table keys of the inserted rows.
+        '''
+        if table == 'devices':
+            self.database_sql.load_device_rows(
+                ((x[('device', 'id')],
+                  x[('device', 'full_name')],
+                  x[('device', 'name')],
+                  x[('device', 'platform')],
+                  x[('device', 'series')],
+                  x[('device', 'family')],
+                  x[('device', 'subfamily')],
+                  x[('source','path')]) for x in records),
+                cursor)
+            return [key for x in records for key in (('device_id', x[('device', 'id')]), ('device_name', x[('device', 'name')]))]
+        elif table == 'parts':
+            self.database_sql.load_part_rows(
+                ((x[('part','name')],
+                  x[('device','id')],
+                  x[('source','path')]) for x in records),
+                cursor)
+            return [key for x in records for key in (('part_name', x[('part','name')]), ('device_id', x[('device','id')]))]
+        elif table == 'cores':
+            self.database_sql.load_core_rows(
+                ((x[('device','id')],
+                  x[('core','id')],
+                  x[('core','type')],
+                  x[('source','path')]) for x in records),
+                cursor)
+            return [('device_id', x[('device','id')]) for x in records]
+        elif table == 'boards':
+            self.database_sql.load_board_rows(
+                ((x[('board','name')],
+                  x[('part','name')],
+                  x[('source','path')]) for x in records),
+                cursor)
+            return [('board_name', x[('board','name')]) for x in records]
+        elif table == 'examples':
+            self.database_sql.load_example_rows(
+                ((x[('example','name')],
+                  x[('example','category')],
+                  x[('example','path')],
+                  x[('source','path')]) for x in records),
+                cursor)
+            return [('example_path', x[('example','path')]) for x in records]
+        raise ValueError(f'Unknown table: {table}')
+
+    def build_database(self, database_file_path):
+        manifest_root_path = self.manifest_root_path
+        core_root_path = self.core_root_path
+        timestamp1 = time.time()
+        print('Loading data from repositories. Expected load time is 40 seconds.')
+
+        # One walk of the device and example trees finds the sources of all tables
+        self.source_data = sl.SourceDataLoader(manifest_root_path, core_root_path)
+        source_files = self.source_data.get_source_files()
+        timestamp2 = time.time()
+        time_delta = str(datetime.timedelta(seconds=timestamp2 - timestamp1))
+        print(f'source files scan time: {time_delta}')
+
+        self.build_command_data = bcl.BuildCommandDataLoader(manifest_root_path, core_root_path, use_example_index=True)
+        build_command_data = self.build_command_data.load(source_files['example'])
+
+        example_paths = []
+        for x in build_command_data:
+            example_paths.append(x[('example','path')])
+        example_paths = list(sorted(set(example_paths)))
+
+        # The database is built aside, an interrupted build leaves the database file untouched
+        build_file_path = self.database_sql.build_file_path(database_file_path)
+        self.database_sql.initialize_database(build_file_path)
+        self.database_sql.begin_bulk_load()
+
+        cursor = self.database_sql.conn.cursor()
+        cursor.execute('BEGIN TRANSACTION')
+
+        self.database_sql.load_build_command_rows(
+            ((i,
+              x[('raw_build_command',)],
+              x[('example','path')],
+              x[('board','name')],
+              x[('device','name')],
+              x[('toolchain',)],
+              x[('config',)],
+              x[('sysbuild',)],
+              x[('core','id')]) for i, x in enumerate(build_command_data)),
+            cursor)
+        timestamp3 = time.time()
+        time_delta = str(datetime.timedelta(seconds=timestamp3 - timestamp2))
+        print(f'build commands load time: {time_delta}')
+
+        # Devices, parts, cores, boards and examples are parsed in one pool and inserted
+        # as the workers return them
+        for table, records in self.source_data.iter_load(source_files, example_paths):
+            self.load_table_rows(table, records, cursor)
+        timestamp4 = time.time()
+        time_delta = str(datetime.timedelta(seconds=timestamp4 - timestamp3))
+        print(f'source data load time: {time_delta}')
+
+        self.database_sql.load_source_file_rows(
+            ((self.source_path(filepath), kind, *file_fingerprint(filepath))
+             for kind, files in source_files.items() for filepath in files),
+            cursor)
+
+        cursor.execute('COMMIT')
+        timestamp5 = time.time()
+        time_delta = str(datetime.timedelta(seconds=timestamp5 - timestamp4))
+        print(f'database load time: {time_delta}')
+
+        # The lookup and super_table indexes are created after their tables are filled
+        self.database_sql.create_supertable()
+        self.database_sql.end_bulk_load()
+        timestamp6 = time.time()
+        time_delta = str(datetime.timedelta(seconds=timestamp6 - timestamp5))
+        print(f'super table create time: {time_delta}')
+        row_counts = self.database_sql.get_table_row_counts()
+        print('rows: ' + ', '.join(f'{table} {count}' for table, count in row_counts.items()))
+
+        self.database_sql.conn.close()
+        os.replace(build_file_path, database_file_path)
+        self.database_sql.connect(database_file_path)
+
+    def update_source_files(self, kind, files, cursor):
+        '''
+        Compare the files of kind with their stored fingerprints and store the new ones.
+        A file is changed if its content hash differs, touching a file does not count.
+        Return the changed or added files and the source paths of the removed ones.
+        '''
+        stored = self.database_sql.get_source_files(kind)
+        changed = []
+        for filepath in files:
+            path = self.source_path(filepath)
+            stat = os.stat(filepath)
+            old_fingerprint = stored.pop(path, None)
+            if old_fingerprint and old_fingerprint[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            fingerprint = file_fingerprint(filepath)
+            if old_fingerprint is None or old_fingerprint[2] != fingerprint[2]:
+                changed.append(filepath)
+            self.database_sql.load_source_file_row(path, kind, *fingerprint, cursor)
+        for path in stored:
+            self.database_sql.delete_source_file_row(path, cursor)
+        return changed, list(stored)
+
+    def refresh_database(self):
+        print('Refreshing data from repositories.')
+        timestamp1 = time.time()
+        manifest_root_path = self.manifest_root_path
+        core_root_path = self.core_root_path
+        touched_keys = {key: set() for key in db_sql.SUPER_TABLE_KEYS}
+        self.source_data = sl.SourceDataLoader(manifest_root_path, core_root_path)
+        source_files = self.source_data.get_source_files()
+        load_paths = []
+
+        cursor = self.database_sql.conn.cursor()
+        cursor.execute('BEGIN TRANSACTION')
+
+        # Any example.yml may change the targets of other examples, search them all again and
+        # only update the build commands which differ, the example index keeps the search fast
+        changed, removed = self.update_source_files('example', source_files['example'], cursor)
+        if changed or removed:
+            self.build_command_data = bcl.BuildCommandDataLoader(manifest_root_path, core_root_path, use_example_index=True)
+            build_command_data = self.build_command_data.load(source_files['example'])
+            new_commands = {x[('raw_build_command',)]: x for x in build_command_data}
+            old_commands = self.database_sql.get_build_commands()
+            next_id = self.database_sql.get_next_build_command_id()
+            for raw_build_command, example_path in old_commands.items():
+                if raw_build_command not in new_commands:
+                    self.database_sql.delete_build_command_row(raw_build_command, cursor)
+                    touched_keys['raw_build_command'].add(raw_build_command)
+                    touched_keys['example_path'].add(example_path)
+            for raw_build_command, x in new_commands.items():
+                if raw_build_command in old_commands:
+                    continue
+                self.database_sql.load_build_command_row(
+                    idx = next_id,
+                    raw_build_command = raw_build_command,
+                    example_path = x[('example','path')],
+                    board_name = x[('board','name')],
+                    device_name = x[('device','name')],
+                    toolchain = x[('toolchain',)],
+                    config = x[('config',)],
+                    sysbuild = x[('sysbuild',)],
+                    core_id = x[('core','id')],
+                    cursor = cursor)
+                next_id += 1
+                touched_keys['raw_build_command'].add(raw_build_command)
+                touched_keys['example_path'].add(x[('example','path')])
+
+            # Examples whose example.yml changed, and examples which appeared or disappeared
+            old_paths = set(old_commands.values())
+            new_paths = set(x[('example','path')] for x in build_command_data)
+            changed_sources = set(self.source_path(filepath) for filepath in changed) | set(removed)
+            changed_paths = set(path for path in old_paths | new_paths if f'{path}/example.yml' in changed_sources)
+            self.database_sql.pop_example_rows_by_path(changed_paths | (old_paths - new_paths), cursor)
+            touched_keys['example_path'].update(changed_paths | (old_paths ^ new_paths))
+            load_paths = sorted((changed_paths & new_paths) | (new_paths - old_paths))
+            print(f'examples: {len(changed)} changed, {len(removed)} removed example.yml files')
+
+        changed_boards, removed = self.update_source_files('board', source_files['board'], cursor)
+        stale_sources = [self.source_path(filepath) for filepath in changed_boards] + removed
+        for board_name, in self.database_sql.pop_rows_by_source('boards', ('board_name',), stale_sources, cursor):
+            touched_keys['board_name'].add(board_name)
+        if stale_sources:
+            print(f'boards: {len(changed_boards)} changed, {len(removed)} removed prj.conf files')
+
+        # Devices, parts and cores are all loaded from chip.yml
+        changed_devices, removed = self.update_source_files('device', source_files['device'], cursor)
+        stale_sources = [self.source_path(filepath) for filepath in changed_devices] + removed
+        for device_id, device_name in self.database_sql.pop_rows_by_source('devices', ('device_id', 'device_name'), stale_sources, cursor):
+            touched_keys['device_id'].add(device_id)
+            touched_keys['device_name'].add(device_name)
+        for part_name, device_id in self.database_sql.pop_rows_by_source('parts', ('part_name', 'device_id'), stale_sources, cursor):
+            touched_keys['part_name'].add(part_name)
+            touched_keys['device_id'].add(device_id)
+        for device_id, in self.database_sql.pop_rows_by_source('cores', ('device_id',), stale_sources, cursor):
+            touched_keys['device_id'].add(device_id)
+        if stale_sources:
+            print(f'devices: {len(changed_devices)} changed, {len(removed)} removed chip.yml files')
+
+        # The changed chip.yml, prj.conf and example.yml files are parsed in one pass
+        changed_files = {'device': changed_devices, 'board': changed_boards}
+        for table, records in self.source_data.iter_load(changed_files, load_paths):
+            for key, value in self.load_table_rows(table, records, cursor):
+                touched_keys[key].add(value)
+
+        cursor.execute('COMMIT')
+
+        rows = self.database_sql.refresh_supertable(touched_keys)
+        timestamp2 = time.time()
+        print(f'refreshed {rows} super table rows, refresh time: {str(datetime.timedelta(seconds=timestamp2 - timestamp1))}')
+
 if __name__ == "__main__":
     current_dir = pathlib.Path().cwd()
     manifest_root_path = pathlib.Path(current_dir, '../../../../manifest')
@@ -0,0 +1,72 @@
+# Copyright 2025 NXP
+# SPDX-License-Identifier: BSD-3-Clause
+
+import sys
+import pathlib
+import csv
+import json
+
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../database')
+import database_sqlite as db_sql
+
+QUERY_FORMATS = ['json', 'csv']
+DEFAULT_QUERY_COLUMNS = ['raw_build_command']
+
+def parse_filters(filters):
+    '''
+    Turn COLUMN=VALUE[,VALUE...] filters into a get_requested request, the values of a
+    repeated column are merged. A filter without a value is an error, it would otherwise
+    match every row.
+    '''
+    request = dict()
+    for item in filters or []:
+        column, separator, values = item.partition('=')
+        column = column.strip()
+        if not separator or not column:
+            raise ValueError(f'Invalid filter {item}, expected COLUMN=VALUE[,VALUE...]')
+        values = [value.strip() for value in values.split(',') if value.strip()]
+        if not values:
+            raise ValueError(f'Invalid filter {item}, no value given for {column}')
+        request.setdefault(column, list()).extend(values)
+    return request
+
+def run_query(database_sql, request, columns=None, output_format='json', count_only=False, stream=sys.stdout):
+    '''
+    Write the distinct values of columns of the super_table rows matching request to stream,
+    as a JSON array of objects or as CSV with a header. Rows are written while they are
+    fetched. With count_only only the number of matching rows is written.
+    Return the number of rows.
+    '''
+    columns = columns or DEFAULT_QUERY_COLUMNS
+    if output_format not in QUERY_FORMATS:
+        raise ValueError(f'Unknown query format {output_format}, expected one of {QUERY_FORMATS}')
+    if count_only:
+        count = database_sql.count_requested(request, columns, distinct=True)
+        stream.write(f'{count}\n')
+        return count
+
+    rows = database_sql.iter_requested(request, columns, distinct=True)
+    count = 0
+    if output_format == 'csv':
+        writer = csv.writer(stream, lineterminator='\n')
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        stream.write('[')
+        for row in rows:
+            stream.write(',\n  ' if count else '\n  ')
+            stream.write(json.dumps(dict(zip(columns, row))))
+            count += 1
+        stream.write('\n]\n' if count else ']\n')
+    stream.flush()
+    return count
+
+def query_columns():
+    return db_sql.DataBaseSQL().sql_super_table_types
+
+if __name__ == "__main__":
+    database_sql = db_sql.DataBaseSQL()
+    database_sql.connect(sys.argv[1])
+    run_query(database_sql, parse_filters(sys.argv[2:]))
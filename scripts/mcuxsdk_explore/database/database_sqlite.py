@@ -4,6 +4,45 @@
 import pathlib
 import sqlite3
 
+# Bump when the table layout changes, an older database is rebuilt instead of refreshed
+SCHEMA_VERSION = '3'
+
+# super_table columns which identify the rows affected by a refresh
+SUPER_TABLE_KEYS = [
+    'raw_build_command',
+    'example_path',
+    'board_name',
+    'part_name',
+    'device_id',
+    'device_name',
+]
+
+# super_table columns used as filters, indexed so a selection does not scan the whole table
+SUPER_TABLE_INDEXES = [
+    'raw_build_command',
+    'example_path',
+    'board_name',
+    'toolchain',
+    'config',
+    'example_name',
+    'example_category',
+    'part_name',
+    'device_id',
+    'device_full_name',
+    'device_name',
+    'device_platform',
+    'device_series',
+    'device_family',
+    'device_subfamily',
+    'core_id',
+    'core_type']
+
+# Size of the sqlite3 prepared statement cache, queries only differ by their filtered columns and value counts
+CACHED_STATEMENTS = 512
+
+# Rows fetched at once when a query result is streamed
+FETCH_BATCH_SIZE = 1000
+
 class DataBaseSQL():
     def __init__(self):
         self.conn = None
@@ -35,7 +74,8 @@ class DataBaseSQL():
             db_path.parent.mkdir(parents=True, exist_ok=True)
         if db_path.exists():
             db_path.unlink()
-        self.conn = sqlite3.connect(database_file_path)
+        self.conn = sqlite3.connect(database_file_path, cached_statements=CACHED_STATEMENTS)
+        self.db_file_path = database_file_path
 
         self.sqlite_build_command_table()
         self.sqlite_boards_table()
@@ -43,12 +83,50 @@ class DataBaseSQL():
         self.sqlite_parts_table()
         self.sqlite_example_table()
         self.sqlite_cores_table()
+        self.sqlite_metadata_tables()
+
+    def begin_bulk_load(self):
+        '''
+        Trade durability for speed while the database is built. The database must be built
+        into a file which replaces the database file only once it is complete, see
+        build_file_path. Must be called outside of a transaction.
+        '''
+        self.conn.execute('PRAGMA journal_mode=MEMORY')
+        self.conn.execute('PRAGMA synchronous=OFF')
+
+    def end_bulk_load(self):
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.conn.execute('PRAGMA journal_mode=DELETE')
 
     def exist(self, database_file_path):
         return pathlib.Path(database_file_path).is_file()
 
+    def build_file_path(self, database_file_path):
+        '''
+        Return the file a new database is built into. It is next to the database file so
+        the complete build can replace it with os.replace.
+        '''
+        db_path = pathlib.Path(database_file_path)
+        return db_path.with_name(f'{db_path.name}.tmp')
+
     def connect(self, database_file_path):
-        self.conn = sqlite3.connect(database_file_path)
+        self.conn = sqlite3.connect(database_file_path, cached_statements=CACHED_STATEMENTS)
+        self.db_file_path = database_file_path
+
+    def open_connection(self):
+        '''
+        Return a new DataBaseSQL connected to the same database file from the calling
+        thread, a connection can only be used by the thread which opened it.
+        '''
+        database_sql = DataBaseSQL()
+        database_sql.conn = sqlite3.connect(self.db_file_path, cached_statements=CACHED_STATEMENTS)
+        database_sql.db_file_path = self.db_file_path
+        return database_sql
+
+    def interrupt(self):
+        '''Abort the query running on the connection, safe to call from another thread.'''
+        if self.conn:
+            self.conn.interrupt()
 
     def sqlite_build_command_table(self):
         self.conn.execute('''CREATE TABLE build_commands
@@ -69,6 +147,7 @@ class DataBaseSQL():
                     (example_name TEXT  NOT NULL,
                     example_category TEXT  NOT NULL,
                     example_path TEXT  NOT NULL,
+                    source_path TEXT,
                     PRIMARY KEY (example_name, example_path)
                     );''')
         self.conn.commit()
@@ -76,7 +155,8 @@ class DataBaseSQL():
     def sqlite_boards_table(self):
         self.conn.execute('''CREATE TABLE boards
                     (board_name TEXT PRIMARY KEY,
-                    part_name TEXT  NOT NULL
+                    part_name TEXT  NOT NULL,
+                    source_path TEXT
                     );''')
         self.conn.commit()
 
@@ -88,7 +168,8 @@ class DataBaseSQL():
                     device_platform TEXT  NOT NULL,
                     device_series TEXT  NOT NULL,
                     device_family TEXT  NOT NULL,
-                    device_subfamily TEXT  NOT NULL
+                    device_subfamily TEXT  NOT NULL,
+                    source_path TEXT
                     );''')
         self.conn.commit()
 
@@ -96,6 +177,7 @@ class DataBaseSQL():
         self.conn.execute('''CREATE TABLE parts
                     (part_name TEXT  NOT NULL,
                     device_id  TEXT  NOT NULL,
+                    source_path TEXT,
                     PRIMARY KEY (part_name, device_id)
                     );''')
         self.conn.commit()
@@ -105,44 +187,183 @@ class DataBaseSQL():
                     (device_id TEXT  NOT NULL,
                     core_id  TEXT  NOT NULL,
                     core_type  TEXT  NOT NULL,
+                    source_path TEXT,
                     PRIMARY KEY (device_id, core_id, core_type)
                     );''')
         self.conn.commit()
 
+    def sqlite_metadata_tables(self):
+        self.conn.execute('''CREATE TABLE metadata
+                    (key TEXT PRIMARY KEY,
+                    value TEXT  NOT NULL
+                    );''')
+        self.conn.execute('''CREATE TABLE source_files
+                    (path TEXT PRIMARY KEY,
+                    kind TEXT  NOT NULL,
+                    mtime_ns INTEGER  NOT NULL,
+                    size INTEGER  NOT NULL,
+                    hash TEXT  NOT NULL
+                    );''')
+        self.conn.execute('INSERT INTO metadata (key, value) VALUES (?, ?)', ('schema_version', SCHEMA_VERSION))
+        self.conn.commit()
+
+    def get_table_row_counts(self):
+        tables = ['build_commands', 'examples', 'boards', 'parts', 'devices', 'cores', 'super_table']
+        return {table: self.conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in tables}
+
+    def get_schema_version(self):
+        try:
+            row = self.conn.execute('SELECT value FROM metadata WHERE key = ?', ('schema_version',)).fetchone()
+        except sqlite3.OperationalError:
+            # Database created before the metadata table existed
+            return None
+        return row[0] if row else None
+
+    def get_source_files(self, kind):
+        cursor = self.conn.execute('SELECT path, mtime_ns, size, hash FROM source_files WHERE kind = ?', (kind,))
+        return {path: (mtime_ns, size, file_hash) for path, mtime_ns, size, file_hash in cursor}
+
+    def load_source_file_row(self, path,
+                                   kind,
+                                   mtime_ns,
+                                   size,
+                                   file_hash,
+                                   cursor):
+        cursor.execute(
+            'INSERT OR REPLACE INTO source_files (path, kind, mtime_ns, size, hash)\
+             VALUES (?, ?, ?, ?, ?)',
+            (path, kind, mtime_ns, size, file_hash)
+        )
+
+    def delete_source_file_row(self, path, cursor):
+        cursor.execute('DELETE FROM source_files WHERE path = ?', (path,))
+
+    def pop_rows_by_source(self, table, columns, source_paths, cursor):
+        '''Delete the rows loaded from source_paths and return their columns.'''
+        rows = []
+        for source_path in source_paths:
+            cursor.execute(f'SELECT {", ".join(columns)} FROM {table} WHERE source_path = ?', (source_path,))
+            rows.extend(cursor.fetchall())
+            cursor.execute(f'DELETE FROM {table} WHERE source_path = ?', (source_path,))
+        return rows
+
+    def pop_example_rows_by_path(self, example_paths, cursor):
+        rows = []
+        for example_path in example_paths:
+            cursor.execute('SELECT example_path FROM examples WHERE example_path = ?', (example_path,))
+            rows.extend(cursor.fetchall())
+            cursor.execute('DELETE FROM examples WHERE example_path = ?', (example_path,))
+        return rows
+
+    def get_build_commands(self):
+        cursor = self.conn.execute('SELECT raw_build_command, example_path FROM build_commands')
+        return dict(cursor.fetchall())
+
+    def get_next_build_command_id(self):
+        row = self.conn.execute('SELECT MAX(CAST(id AS INTEGER)) FROM build_commands').fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def delete_build_command_row(self, raw_build_command, cursor):
+        cursor.execute('DELETE FROM build_commands WHERE raw_build_command = ?', (raw_build_command,))
+
+    def load_source_file_rows(self, rows, cursor):
+        '''rows: iterable of (path, kind, mtime_ns, size, hash) tuples'''
+        cursor.executemany(
+            'INSERT OR REPLACE INTO source_files (path, kind, mtime_ns, size, hash)\
+             VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def load_example_rows(self, rows, cursor):
+        '''rows: iterable of (example_name, example_category, example_path, source_path) tuples'''
+        cursor.executemany(
+            'INSERT INTO examples (example_name, example_category, example_path, source_path)\
+             VALUES (?, ?, ?, ?)',
+            rows
+        )
+
+    def load_part_rows(self, rows, cursor):
+        '''rows: iterable of (part_name, device_id, source_path) tuples'''
+        cursor.executemany(
+            'INSERT INTO parts (part_name, device_id, source_path) VALUES (?, ?, ?)',
+            rows
+        )
+
+    def load_core_rows(self, rows, cursor):
+        '''rows: iterable of (device_id, core_id, core_type, source_path) tuples'''
+        cursor.executemany(
+            'INSERT INTO cores (device_id, core_id, core_type, source_path)\
+             VALUES (?, ?, ?, ?)',
+            rows
+        )
+
+    def load_board_rows(self, rows, cursor):
+        '''rows: iterable of (board_name, part_name, source_path) tuples'''
+        cursor.executemany(
+            'INSERT INTO boards (board_name, part_name, source_path) VALUES (?, ?, ?)',
+            rows
+        )
+
+    def load_device_rows(self, rows, cursor):
+        '''
+        rows: iterable of (device_id, device_full_name, device_name, device_platform,
+        device_series, device_family, device_subfamily, source_path) tuples
+        '''
+        cursor.executemany(
+            'INSERT INTO devices (device_id, device_full_name, device_name, device_platform, device_series, device_family, device_subfamily, source_path) \
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def load_build_command_rows(self, rows, cursor):
+        '''
+        rows: iterable of (id, raw_build_command, example_path, board_name, device_name,
+        toolchain, config, sysbuild, core_id) tuples
+        '''
+        cursor.executemany(
+            'INSERT INTO build_commands (id, raw_build_command, example_path, board_name, device_name, toolchain, config, sysbuild, core_id)\
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
     def load_example_row(self, example_name,
                                example_category,
                                example_path,
-                               cursor):
+                               cursor,
+                               source_path=None):
         cursor.execute(
-            'INSERT INTO examples (example_name, example_category, example_path)\
-             VALUES (?, ?, ?)',
-            (example_name, example_category, example_path)
+            'INSERT INTO examples (example_name, example_category, example_path, source_path)\
+             VALUES (?, ?, ?, ?)',
+            (example_name, example_category, example_path, source_path)
         )
 
     def load_part_row(self, part_name,
                             device_id,
-                            cursor):
+                            cursor,
+                            source_path=None):
         cursor.execute(
-            'INSERT INTO parts (part_name, device_id) VALUES (?, ?)',
-            (part_name, device_id)
+            'INSERT INTO parts (part_name, device_id, source_path) VALUES (?, ?, ?)',
+            (part_name, device_id, source_path)
         )
 
     def load_core_row(self, device_id,
                             core_id,
                             core_type,
-                            cursor):
+                            cursor,
+                            source_path=None):
         cursor.execute(
-            'INSERT INTO cores (device_id, core_id, core_type)\
-             VALUES (?, ?, ?)',
-            (device_id, core_id, core_type)
+            'INSERT INTO cores (device_id, core_id, core_type, source_path)\
+             VALUES (?, ?, ?, ?)',
+            (device_id, core_id, core_type, source_path)
         )
 
     def load_board_row(self, board_name,
                              part_name,
-                             cursor):
+                             cursor,
+                             source_path=None):
         cursor.execute(
-            'INSERT INTO boards (board_name, part_name) VALUES (?, ?)',
-            (board_name, part_name)
+            'INSERT INTO boards (board_name, part_name, source_path) VALUES (?, ?, ?)',
+            (board_name, part_name, source_path)
         )
 
     def load_device_row(self, device_id,
@@ -152,17 +373,19 @@ class DataBaseSQL():
                               device_series,
                               device_family,
                               device_subfamily,
-                              cursor):
+                              cursor,
+                              source_path=None):
         cursor.execute(
-            'INSERT INTO devices (device_id, device_full_name, device_name, device_platform, device_series, device_family, device_subfamily) \
-             VALUES (?, ?, ?, ?, ?, ?, ?)',
+            'INSERT INTO devices (device_id, device_full_name, device_name, device_platform, device_series, device_family, device_subfamily, source_path) \
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
             (device_id,
              device_full_name,
              device_name,
              device_platform,
              device_series,
              device_family,
-             device_subfamily)
+             device_subfamily,
+             source_path)
         )
 
     def load_build_command_row(self, idx,
@@ -189,72 +412,279 @@ class DataBaseSQL():
              core_id)
         )
 
-    def create_supertable(self):
-        cursor = self.conn.cursor()
-        sql = '''
-        CREATE TABLE super_table AS
-            SELECT bc.raw_build_command,
-                   bc.example_path,
-                   bc.board_name,
-                   bc.toolchain,
-                   bc.config,
-                   bc.sysbuild,
-                   e.example_name,
-                   e.example_category,
-                   p.part_name,
-                   d.device_id,
-                   d.device_full_name,
-                   d.device_name,
-                   d.device_platform,
-                   d.device_series,
-                   d.device_family,
-                   d.device_subfamily,
+    def sqlite_super_view(self):
+        '''
+        The normalized view super_table is materialized from.
+
+        A build command gets its device from its board part, or from its device name for
+        device examples. Joining on either with one OR condition prevents SQLite from using
+        an index, so each is an indexed join of its own and the results are combined with
+        UNION ALL, together with the build commands without any device. A device matched
+        both ways is only taken from the board part, so the rows are the same as with OR.
+        '''
+        self.conn.execute('CREATE INDEX IF NOT EXISTS examples_example_path ON examples (example_path)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS devices_device_name ON devices (device_name)')
+        self.conn.execute('''CREATE VIEW IF NOT EXISTS super_view AS
+            WITH bc_part AS (
+                SELECT bc.raw_build_command,
+                       bc.example_path,
+                       bc.board_name,
+                       bc.device_name AS bc_device_name,
+                       bc.toolchain,
+                       bc.config,
+                       bc.sysbuild,
+                       bc.core_id AS bc_core_id,
+                       e.example_name,
+                       e.example_category,
+                       p.part_name,
+                       p.device_id AS part_device_id
+                FROM
+                    build_commands bc
+                LEFT JOIN
+                    examples e ON e.example_path = bc.example_path
+                LEFT JOIN
+                    boards b ON b.board_name = bc.board_name
+                LEFT JOIN
+                    parts p ON p.part_name = b.part_name
+            ),
+            bc_device AS (
+                SELECT x.*, d.device_id, d.device_full_name, d.device_name, d.device_platform,
+                       d.device_series, d.device_family, d.device_subfamily
+                FROM bc_part x
+                JOIN devices d ON d.device_id = x.part_device_id
+                UNION ALL
+                SELECT x.*, d.device_id, d.device_full_name, d.device_name, d.device_platform,
+                       d.device_series, d.device_family, d.device_subfamily
+                FROM bc_part x
+                JOIN devices d ON d.device_name = x.bc_device_name AND d.device_id IS NOT x.part_device_id
+                UNION ALL
+                SELECT x.*, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+                FROM bc_part x
+                WHERE NOT EXISTS (SELECT 1 FROM devices d WHERE d.device_id = x.part_device_id)
+                  AND NOT EXISTS (SELECT 1 FROM devices d WHERE d.device_name = x.bc_device_name)
+            )
+            SELECT xd.raw_build_command,
+                   xd.example_path,
+                   xd.board_name,
+                   xd.toolchain,
+                   xd.config,
+                   xd.sysbuild,
+                   xd.example_name,
+                   xd.example_category,
+                   xd.part_name,
+                   xd.device_id,
+                   xd.device_full_name,
+                   xd.device_name,
+                   xd.device_platform,
+                   xd.device_series,
+                   xd.device_family,
+                   xd.device_subfamily,
                    c.core_id,
                    c.core_type
             FROM
-                build_commands bc
-            LEFT JOIN
-                examples e ON e.example_path = bc.example_path
-            LEFT JOIN
-                boards b ON b.board_name = bc.board_name
+                bc_device xd
             LEFT JOIN
-                parts p ON p.part_name = b.part_name
-            LEFT JOIN
-                devices d ON d.device_id = p.device_id OR d.device_name = bc.device_name
-            LEFT JOIN
-                cores c ON c.device_id = d.device_id AND (c.core_id = bc.core_id OR bc.core_id IS NULL)
-            ;'''
-        cursor.execute(sql)
-        return cursor.fetchall()
+                cores c ON c.device_id = xd.device_id AND (c.core_id = xd.bc_core_id OR xd.bc_core_id IS NULL)
+            ;''')
+        self.conn.commit()
 
-    def get_requested(self, requested_items, return_sql_types=None):
-        where_conditions = str()
-        select_types = '*'
+    def create_supertable(self):
+        cursor = self.conn.cursor()
+        self.sqlite_super_view()
+        cursor.execute('CREATE TABLE super_table AS SELECT * FROM super_view;')
+        self.create_supertable_indexes()
+        self.analyze_supertable()
+        return self.conn.execute('SELECT COUNT(*) FROM super_table').fetchone()[0]
+
+    def create_supertable_indexes(self):
+        for column in SUPER_TABLE_INDEXES:
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS super_table_{column} ON super_table ({column})')
+        self.conn.commit()
+
+    def analyze_supertable(self):
+        '''
+        Gather the index statistics of super_table. Without them the query planner can not
+        tell a selective column from a poor one, and a query filtering on several columns
+        may scan the least selective index.
+        '''
+        self.conn.execute('ANALYZE super_table')
+        self.conn.commit()
+
+    def has_supertable(self):
+        return bool(self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'super_table'").fetchone())
+
+    def has_supertable_indexes(self):
+        cursor = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'super_table'")
+        indexes = {name for name, in cursor}
+        return all(f'super_table_{column}' in indexes for column in SUPER_TABLE_INDEXES)
+
+    def upgrade_supertable(self):
+        '''
+        Add the super_table indexes and statistics missing in a database built before they
+        were introduced. Nothing is written to a database which has them.
+        '''
+        if not self.has_supertable_indexes():
+            self.create_supertable_indexes()
+        if not self.has_supertable_statistics():
+            self.analyze_supertable()
+
+    def has_supertable_statistics(self):
+        if not self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            return False
+        return bool(self.conn.execute("SELECT 1 FROM sqlite_stat1 WHERE tbl = 'super_table'").fetchone())
 
+    def refresh_supertable(self, touched_keys):
+        '''
+        Rebuild the super_table rows of the build commands affected by the touched keys.
+
+        touched_keys maps a SUPER_TABLE_KEYS column to the changed values, old and new ones.
+        The rows of a build command only depend on its example, board, part, devices and
+        cores. So the affected build commands are the ones whose current rows reference a
+        touched key, and the ones the changed tables now join to a touched key. Deleting and
+        reselecting all of their rows gives the same super_table as a full rebuild.
+        '''
+        cursor = self.conn.cursor()
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS touched_keys (key_column TEXT NOT NULL, value TEXT NOT NULL)')
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS touched_commands (raw_build_command TEXT PRIMARY KEY)')
+        cursor.execute('DELETE FROM touched_keys')
+        cursor.execute('DELETE FROM touched_commands')
+        cursor.executemany('INSERT INTO touched_keys (key_column, value) VALUES (?, ?)',
+                           [(column, value) for column, values in touched_keys.items() for value in values if value is not None])
+        touched_columns = [column for column, values in touched_keys.items() if values]
+        if not touched_columns:
+            self.conn.commit()
+            return 0
+        select_keys = lambda column: f"(SELECT value FROM touched_keys WHERE key_column = '{column}')"
+        # Build commands which referenced a touched key before the change
+        cursor.execute(f'''INSERT OR IGNORE INTO touched_commands
+            SELECT raw_build_command FROM super_table
+            WHERE {' OR '.join(f'{column} IN {select_keys(column)}' for column in touched_columns)}''')
+        # and the ones which reference it now
+        cursor.execute(f'''INSERT OR IGNORE INTO touched_commands
+            SELECT raw_build_command FROM build_commands
+            WHERE raw_build_command IN {select_keys('raw_build_command')}
+               OR example_path IN {select_keys('example_path')}
+               OR board_name IN {select_keys('board_name')}
+               OR board_name IN (SELECT board_name FROM boards WHERE part_name IN {select_keys('part_name')})
+               OR board_name IN (SELECT b.board_name FROM boards b JOIN parts p ON p.part_name = b.part_name
+                                 WHERE p.device_id IN {select_keys('device_id')})
+               OR device_name IN {select_keys('device_name')}
+               OR device_name IN (SELECT device_name FROM devices WHERE device_id IN {select_keys('device_id')})''')
+        where_conditions = 'raw_build_command IN (SELECT raw_build_command FROM touched_commands)'
+        cursor.execute(f'DELETE FROM super_table WHERE {where_conditions}')
+        cursor.execute(f'INSERT INTO super_table SELECT * FROM super_view WHERE {where_conditions}')
+        rows = cursor.rowcount
+        self.conn.commit()
+        return rows
+
+    def requested_conditions(self, requested_items):
+        '''
+        Return the bound WHERE conditions and parameters matching all the requested columns,
+        a row matches a column if it has any of the requested values of the column.
+        '''
+        where_conditions = list()
+        parameters = list()
         if requested_items:
             for mcux_type, value in requested_items.items():
-                for x in value:
-                    if x:
-                        where_conditions += f"super_table.{mcux_type} = '{x}'"
-                        where_conditions += r' AND '
-            if where_conditions:
-                where_conditions = where_conditions[:-4]
+                values = [x for x in value if x]
+                if not values:
+                    continue
+                # Column names can not be bound, only known columns are accepted
+                if mcux_type not in self.sql_super_table_types:
+                    raise ValueError(f'Unknown super_table column {mcux_type}')
+                where_conditions.append(f"super_table.{mcux_type} IN ({', '.join('?' * len(values))})")
+                parameters.extend(values)
+        return ' AND '.join(where_conditions), parameters
 
+    def requested_select(self, return_sql_types=None, distinct=False):
+        select_types = '*'
         if return_sql_types:
             for sql_type in return_sql_types:
-              select_types = ', '.join(return_sql_types)
+                if sql_type not in self.sql_super_table_types:
+                    raise ValueError(f'Unknown super_table column {sql_type}')
+            select_types = ', '.join(return_sql_types)
+        if distinct:
+            select_types = 'DISTINCT ' + select_types
+        return select_types
+
+    def get_requested(self, requested_items, return_sql_types=None):
+        '''
+        Return the super_table rows matching all the requested columns, a row matches a
+        column if it has any of the requested values of the column.
+        '''
+        where_conditions, parameters = self.requested_conditions(requested_items)
+        select_types = self.requested_select(return_sql_types)
+        return self.execute_supertable_query(where_conditions, select_types, parameters)
+
+    def iter_requested(self, requested_items, return_sql_types=None, distinct=False, batch_size=FETCH_BATCH_SIZE):
+        '''
+        Yield the rows of get_requested ordered by the returned columns, fetched in batches
+        so a large result is written out while it is read and never held in memory.
+        '''
+        where_conditions, parameters = self.requested_conditions(requested_items)
+        select_types = self.requested_select(return_sql_types, distinct)
+        order_by = ', '.join(return_sql_types) if return_sql_types else None
+        cursor = self.supertable_cursor(where_conditions, select_types, parameters, order_by)
+        while (rows := cursor.fetchmany(batch_size)):
+            yield from rows
+
+    def count_requested(self, requested_items, return_sql_types=None, distinct=False):
+        where_conditions, parameters = self.requested_conditions(requested_items)
+        select_types = self.requested_select(return_sql_types, distinct)
+        where = str()
+        if where_conditions:
+            where = 'WHERE '+ where_conditions
+        sql = f'''
+        SELECT COUNT(*) FROM (
+        SELECT {select_types}
+        FROM super_table
+        {where}
+        );'''
+        return self.conn.execute(sql, parameters).fetchone()[0]
+
+    def get_facet_counts(self, requested_items, facet_sql_types=None):
+        '''
+        Return {column: {value: count}} of the distinct non empty values of the facet columns
+        in the super_table rows matching the requested columns, with the number of matching
+        rows having the value.
+        '''
+        facet_sql_types = facet_sql_types or self.sql_super_table_types
+        for sql_type in facet_sql_types:
+            if sql_type not in self.sql_super_table_types:
+                raise ValueError(f'Unknown super_table column {sql_type}')
+        where_conditions, parameters = self.requested_conditions(requested_items)
+        where = str()
+        if where_conditions:
+            where = 'AND '+ where_conditions
+        # Every facet is grouped in the same query, each group uses the column index
+        facets = '\n        UNION ALL'.join(f'''
+        SELECT '{sql_type}', {sql_type}, COUNT(*)
+        FROM super_table
+        WHERE {sql_type} IS NOT NULL AND {sql_type} != '' {where}
+        GROUP BY {sql_type}''' for sql_type in facet_sql_types)
+        cursor = self.conn.cursor()
+        cursor.execute(f'{facets}\n        ;', parameters * len(facet_sql_types))
+        facet_counts = {sql_type: dict() for sql_type in facet_sql_types}
+        for sql_type, value, count in cursor:
+            facet_counts[sql_type][value] = count
+        return facet_counts
 
-        return self.execute_supertable_query(where_conditions, select_types)
+    def execute_supertable_query(self, where_conditions, select_types='*', parameters=()):
+        return self.supertable_cursor(where_conditions, select_types, parameters).fetchall()
 
-    def execute_supertable_query(self, where_conditions, select_types='*'):
+    def supertable_cursor(self, where_conditions, select_types='*', parameters=(), order_by=None):
         where = str()
         if where_conditions:
             where = 'WHERE '+ where_conditions
+        order = str()
+        if order_by:
+            order = 'ORDER BY '+ order_by
         cursor = self.conn.cursor()
         sql = f'''
         SELECT {select_types}
         FROM super_table
         {where}
+        {order}
         ;'''
-        cursor.execute(sql)
-        return cursor.fetchall()
+        cursor.execute(sql, parameters)
+        return cursor
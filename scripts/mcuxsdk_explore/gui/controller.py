@@ -4,6 +4,116 @@
 import tkinter as tk
 import datetime
 import time
+import queue
+import sqlite3
+import threading
+import functools
+import logging
+
+DEBOUNCE_MS = 150
+POLL_MS = 20
+
+logger = logging.getLogger(__name__)
+
+def timeit(func):
+    '''Log the run time of func at debug level.'''
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        t1 = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            t2 = time.time()
+            logger.debug(f'{func.__name__} time: {str(datetime.timedelta(seconds=t2 - t1))}')
+    return inner
+
+class QueryScheduler():
+    '''
+    Run the model queries on a worker thread with its own SQLite connection. Requests made
+    within the debounce delay are coalesced, a newer request interrupts the running query
+    and only the result of the latest request is handed back to the Tk mainloop.
+    '''
+    def __init__(self, model, tk_root, debounce_ms=DEBOUNCE_MS):
+        self.model = model
+        self.tk_root = tk_root
+        self.debounce_ms = debounce_ms
+        self.callback = None
+        self.generation = 0
+        self.submitted = None
+        self.pending = None
+        self.polling = False
+        self.last_result = None
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.worker_database = None
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def schedule(self, request, callback):
+        '''
+        Call callback(facet_counts) on the Tk thread with the facets of request once no other
+        request was made for the debounce delay, with None if request is None.
+        '''
+        self.cancel()
+        self.callback = callback
+        self.pending = self.tk_root.after(self.debounce_ms, self.submit, self.generation, request)
+
+    def cancel(self):
+        # Everything requested so far is superseded
+        self.generation += 1
+        if self.pending:
+            self.tk_root.after_cancel(self.pending)
+            self.pending = None
+        if self.worker_database:
+            self.worker_database.interrupt()
+
+    def submit(self, generation, request):
+        self.pending = None
+        if request is None:
+            self.callback(None)
+            return
+        # Typing in a filter entry does not change the request, its facets are reused
+        if self.last_result and self.last_result[0] == request:
+            self.callback(self.last_result[1])
+            return
+        self.submitted = generation
+        self.requests.put((generation, request))
+        if not self.polling:
+            self.polling = True
+            self.tk_root.after(POLL_MS, self.poll)
+
+    def poll(self):
+        while not self.results.empty():
+            generation, request, facet_counts = self.results.get_nowait()
+            if generation == self.generation:
+                self.polling = False
+                if facet_counts is not None:
+                    self.last_result = (request, facet_counts)
+                self.callback(facet_counts)
+                return
+        if self.submitted == self.generation:
+            self.tk_root.after(POLL_MS, self.poll)
+        else:
+            self.polling = False
+
+    def run(self):
+        self.worker_database = self.model.sql_database.open_connection()
+        while True:
+            generation, request = self.requests.get()
+            # Only the latest queued request is still wanted
+            while not self.requests.empty():
+                generation, request = self.requests.get_nowait()
+            if generation != self.generation:
+                continue
+            try:
+                facet_counts = self.model.get_facets_from_database(request, self.worker_database)
+            except sqlite3.OperationalError:
+                if generation != self.generation:
+                    # Interrupted by a newer request
+                    continue
+                # Let the Tk thread query and report the error itself
+                facet_counts = None
+            self.results.put((generation, request, facet_counts))
 
 class GuiController():
     def __init__(self, model, view):
@@ -11,29 +121,27 @@ class GuiController():
         self.view = view
         self.model.controller_callback = self.update_view
         self.model.button_callback = self.clean_view
+        self.scheduler = QueryScheduler(model, view.parent)
 
-    def timeit(self, func):
-        def inner(self):
-            t1 = time.time()
-            func(self)
-            t2 = time.time()
-            print(f'update time: {str(datetime.timedelta(seconds=t2 - t1))}')
-        return inner
-
-#    @self.timeit
     def update_view(self):
         self.load_state_of_widgets()
-        self.model.update_model()
-        self.render_new_view()
+        request = self.model.get_request() if self.model.test_selection() else None
+        self.scheduler.schedule(request, self.apply_update)
 
     def clean_view(self):
-        self.model.update_model()
+        self.scheduler.cancel()
+        self.apply_update(None)
+
+    @timeit
+    def apply_update(self, facet_counts):
+        self.model.update_model(facet_counts)
         self.render_new_view()
 
     def load_state_of_widgets(self):
         for mcux_data_type in self.view.graphical_object['selector'].keys():
             g_object = self.view.graphical_object['selector'][mcux_data_type]
-            selection = [g_object.listbox.get(i) for i in g_object.listbox.curselection()]
+            # The listbox shows counted labels, the selected values are taken from the model
+            selection = [self.model.to_be_visible[mcux_data_type][i] for i in g_object.listbox.curselection()]
             self.model.newly_selected[mcux_data_type] = \
                 list(set(selection) - set(self.model.selected[mcux_data_type]))
             self.model.newly_unselected[mcux_data_type] = \
@@ -44,7 +152,7 @@ class GuiController():
     def render_new_view(self):
         for mcux_data_type in self.view.graphical_object['selector'].keys():
             g_object = self.view.graphical_object['selector'][mcux_data_type]
-            g_object.listbox_variable.set(self.model.to_be_visible[mcux_data_type])
+            g_object.listbox_variable.set(self.model.get_items_to_show(mcux_data_type))
 
             g_object.text.delete('1.0', tk.END)
             length_of_visible = len(self.model.to_be_visible[mcux_data_type])
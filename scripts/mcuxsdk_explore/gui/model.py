@@ -36,12 +36,15 @@ class GuiModel():
         self.newly_unselected = dict()
         self.filter_entry = dict()
         self.dependent_selection = dict()
+        self.counts = dict()
 
         self.symbols = dict()
+        self.symbol_counts = dict()
         self.load_symbols_superset()
 
         for t_tuple in SQL_TYPE_TO_TUPLE_TYPE.values():
             self.to_be_visible[t_tuple] =  self.symbols[t_tuple]
+            self.counts[t_tuple] = self.symbol_counts[t_tuple]
             self.selected[t_tuple] = list()
             self.to_select[t_tuple] = list()
             self.to_unselect[t_tuple] = list()
@@ -63,22 +66,24 @@ class GuiModel():
                 break
         return output
 
-    def update_model(self):
+    def update_model(self, facet_counts=None):
         for t_tuple in SQL_TYPE_TO_TUPLE_TYPE.values():
             self.to_select[t_tuple] = list()
             self.to_unselect[t_tuple] = list()
             self.to_be_visible[t_tuple] = list()
         # Load data from database query
         if self.test_selection():
-            sql_data = self.get_requested_from_database()
-            tuple_type_data = self.convert_to_column_lists(sql_data)
+            if facet_counts is None:
+                facet_counts = self.get_facets_from_database()
             for t_sql, t_tuple in SQL_TYPE_TO_TUPLE_TYPE.items():
-                self.to_be_visible[t_tuple] = tuple_type_data[t_sql]
+                self.to_be_visible[t_tuple] = list(sorted(facet_counts[t_sql]))
+                self.counts[t_tuple] = facet_counts[t_sql]
             self.update_visibility()
         # Load data from superset
         else:
             for t_tuple in SQL_TYPE_TO_TUPLE_TYPE.values():
                 self.to_be_visible[t_tuple] = self.symbols[t_tuple]
+                self.counts[t_tuple] = self.symbol_counts[t_tuple]
             self.update_visibility()
 
     def get_all_data_from_database(self):
@@ -88,32 +93,38 @@ class GuiModel():
         return sql_data
 
     def load_symbols_superset(self):
-        sql_data = self.sql_database.get_requested([])
-        sql_symbols = self.convert_to_column_lists(sql_data)
+        facet_counts = self.sql_database.get_facet_counts({}, list(SQL_TYPE_TO_TUPLE_TYPE.keys()))
         for t_sql, t_tuple in SQL_TYPE_TO_TUPLE_TYPE.items():
-            self.symbols[t_tuple] = sql_symbols[t_sql]
+            self.symbols[t_tuple] = list(sorted(facet_counts[t_sql]))
+            self.symbol_counts[t_tuple] = facet_counts[t_sql]
         return self.symbols
 
     def get_requested_from_database(self):
+        sql_data = self.sql_database.get_requested(self.get_request())
+        return sql_data
+
+    def get_facets_from_database(self, request=None, sql_database=None):
+        '''
+        Return {sql_type: {value: count}} of the values still reachable with the selection,
+        counted by SQLite instead of collecting them from the full rows. A worker thread
+        passes the request taken on the Tk thread and its own database connection.
+        '''
+        if request is None:
+            request = self.get_request()
+        sql_database = sql_database or self.sql_database
+        return sql_database.get_facet_counts(request, list(SQL_TYPE_TO_TUPLE_TYPE.keys()))
+
+    def get_request(self):
         request = {}
         for t_sql, t_tuple in SQL_TYPE_TO_TUPLE_TYPE.items():
             if self.selected[t_tuple]:
                 request[t_sql] = self.selected[t_tuple]
-        sql_data = self.sql_database.get_requested(request)
-        return sql_data
+        return request
 
-    def convert_to_column_lists(self, sql_data):
-        database_types = SQL_TYPE_TO_TUPLE_TYPE.keys()
-        sql_symbols = {}
-        for t_sql in SQL_TYPE_TO_TUPLE_TYPE.keys():
-            sql_symbols[t_sql] = []
-        for row in sql_data:
-            for i, t_sql in enumerate(database_types):
-                if row[i]:
-                    sql_symbols[t_sql].append(row[i])
-        for t_sql in database_types:
-            sql_symbols[t_sql] = list(sorted(set(sql_symbols[t_sql])))
-        return sql_symbols
+    def get_items_to_show(self, data_type):
+        '''Return the visible values of data_type labelled with their matching row counts.'''
+        counts = self.counts[data_type]
+        return [f'{value} ({counts.get(value, 0)})' for value in self.to_be_visible[data_type]]
 
     def get_command_list_to_show(self):
         result_list = list(sorted(set(self.to_be_visible[('raw_build_command',)])))
@@ -139,6 +150,7 @@ class GuiModel():
             self.to_select[t_tuple] = list()
             self.to_unselect[t_tuple] = list()
             self.to_be_visible[t_tuple] = self.symbols[t_tuple]
+            self.counts[t_tuple] = self.symbol_counts[t_tuple]
         self.button_callback()
         self.update_visibility()
 
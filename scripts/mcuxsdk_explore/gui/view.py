@@ -113,7 +113,7 @@ class Selector():
         self.frame2 = tk.Frame(self.frame)
         self.frame2.pack(side=tk.TOP, expand = 1, fill=tk.BOTH)
 
-        self.listbox_variable = tk.Variable(value = self.model.to_be_visible[mcux_data_type])
+        self.listbox_variable = tk.Variable(value = self.model.get_items_to_show(mcux_data_type))
         self.listbox = tk.Listbox(self.frame2,
                                   selectmode='multiple',
                                   listvariable = self.listbox_variable,
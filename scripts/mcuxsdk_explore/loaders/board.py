@@ -5,12 +5,14 @@ import pprint
 import glob
 import re
 import pathlib
-import multiprocessing as mp
-from multiprocessing import Manager
+import sys
 import datetime
 import time
 
-class BoardDataLoader():
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}')
+from data_loader import DataLoader
+
+class BoardDataLoader(DataLoader):
 
     def __init__(self, manifest_root_path, core_root_path):
         self.manifest_root_path = manifest_root_path
@@ -21,9 +23,13 @@ class BoardDataLoader():
             ('part', 'name'),
         ]
 
-    def load(self):
-        files = self.get_device_yml_files()
-        return self.load_files_parallel(files)
+    def load(self, files=None):
+        return list(self.iter_load(files))
+
+    def iter_load(self, files=None):
+        if files is None:
+            files = self.get_device_yml_files()
+        return self.iter_files_parallel(files)
 
     def get_prj_conf_files_from_directory(self, board_directory):
         p = pathlib.Path(board_directory)
@@ -40,8 +46,8 @@ class BoardDataLoader():
             files.extend(self.get_prj_conf_files_from_directory(p))
         return list(sorted(set(files)))
 
-    def load_single_file(self, args):
-        filepath, shared_list, lock = args
+    def load_single_file(self, filepath):
+        data_records = list()
         pattern = r'(?<=CONFIG_MCUX_HW_DEVICE_PART_)(.*)(?=\=y)'
         board = None
         device = None
@@ -56,19 +62,10 @@ class BoardDataLoader():
                         data_record = dict()
                         data_record[('board', 'name')] = pathlib.Path(filepath).parts[-2]
                         data_record[('part', 'name')] = match.group()
-                        with lock:
-                            shared_list.append(data_record)
-
-    def load_files_parallel(self, files, num_processes=None):
-        if num_processes is None:
-            num_processes = mp.cpu_count()
-        with Manager() as manager:
-            shared_list = manager.list()
-            lock = manager.Lock()
-            args = [(filepath, shared_list, lock) for filepath in files]
-            with mp.Pool(processes=num_processes) as pool:
-                pool.map(self.load_single_file, args)
-            return list(shared_list)
+                        data_record[('source', 'path')] = self.source_path(filepath)
+                        data_records.append(data_record)
+        return data_records
+
 
 if __name__ == "__main__":
 
@@ -4,17 +4,20 @@
 import pprint
 import sys
 import pathlib
-import re
 import datetime
 import time
 
 sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../..')
 from misc import sdk_project_target
 
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}')
+import data_loader as dl
+
 class BuildCommandDataLoader():
-    def __init__(self, manifest_root_path, core_root_path):
+    def __init__(self, manifest_root_path, core_root_path, use_example_index=False):
         self.manifest_root_path = manifest_root_path
         self.core_root_path = core_root_path
+        self.use_example_index = use_example_index
 
         self.types = [
             ('raw_build_command',),
@@ -27,65 +30,51 @@ class BuildCommandDataLoader():
             ('sysbuild',),
         ]
 
-    def load(self):
-        build_commands = self.get_all_build_commands()
-        return self.parse_build_commands(build_commands)
+    def load(self, example_files=None):
+        match_cases = self.get_all_project_data(example_files)
+        return self.parse_project_data(match_cases)
 
-    def get_all_build_commands(self):
+    def get_all_project_data(self, example_files=None):
+        '''
+        Return the apps of the example directories. example_files are their example.yml
+        files, as found by SourceDataLoader.get_source_files, the directories are searched
+        for them if None.
+        '''
         match_cases = list()
         op = sdk_project_target.MCUXRepoProjects()
-        p = pathlib.Path(self.core_root_path, 'examples')
-        if p.is_dir():
-            match_cases.extend(op.search_app_targets(app_path='examples',
-                                                     board_cores_filter=[r'r@.']
-                                                    )
-                              )
-        p = pathlib.Path(self.core_root_path, 'examples_int')
-        if p.is_dir():
-            match_cases.extend(op.search_app_targets(app_path='examples_int',
-                                                     board_cores_filter=[r'r@.']
+        if self.use_example_index:
+            # Only the example.yml files changed since the last search are parsed again
+            sdk_project_target.MCUXAppTargets.config_example_index()
+        for directory in ['examples', 'examples_int']:
+            p = pathlib.Path(self.core_root_path, directory)
+            if not p.is_dir():
+                continue
+            directory_files = None
+            if example_files is not None:
+                directory_files = [path for path in (dl.source_path(filepath, self.core_root_path) for filepath in example_files)
+                                   if path.startswith(f'{directory}/')]
+            match_cases.extend(op.search_app_targets(app_path=directory,
+                                                     board_cores_filter=[r'r@.'],
+                                                     example_files=directory_files
                                                     )
                               )
-        return [case.build_cmd for case in match_cases]
+        sdk_project_target.MCUXAppTargets.save_example_index()
+        return match_cases
 
-    def parse_build_commands(self, commands):
+    def parse_project_data(self, match_cases):
+        # The fields come straight from the target search, the build command is not parsed again
         build_commands = list()
-        data = dict()
-        for command in commands:
-            data[('raw_build_command',)]=None
-            data[('example','path')]=None
-            data[('board','name')]=None
-            data[('device','name')]=None
-            data[('toolchain',)]=None
-            data[('config',)]=None
-            data[('core','id')]=None
-            data[('sysbuild',)]=None
-            data[('raw_build_command',)]=command
-
-            tokens = re.split(' |=', command)
-            if '--sysbuild' not in tokens[4]:
-                data[('example','path')]=tokens[4]
-                data[('sysbuild',)]='False'
-            else:
-                data[('example','path')]=tokens[5]
-                data[('sysbuild',)]='True'
-            if '--toolchain' in tokens:
-                i = tokens.index('--toolchain')
-                data[('toolchain',)]=tokens[i+1]
-            if '--config' in tokens:
-                i = tokens.index('--config')
-                data[('config',)]=tokens[i+1]
-            if '-b' in tokens:
-                i = tokens.index('-b')
-                data[('board','name')]=tokens[i+1]
-            if '--device' in tokens:
-                i = tokens.index('--device')
-                data[('device','name')]=tokens[i+1]
-            if '-Dcore_id' in tokens:
-                i = tokens.index('-Dcore_id')
-                data[('core','id')]=tokens[i+1]
-            build_commands.append(data)
+        for case in match_cases:
             data = dict()
+            data[('raw_build_command',)] = case.build_cmd
+            data[('example','path')] = case.project_file
+            data[('board','name')] = case.board
+            data[('device','name')] = case.device
+            data[('toolchain',)] = case.toolchain
+            data[('config',)] = case.target
+            data[('core','id')] = case.core_id or None
+            data[('sysbuild',)] = str(bool(case.use_sysbuild))
+            build_commands.append(data)
         return build_commands
 
 if __name__ == "__main__":
@@ -4,13 +4,16 @@
 import pprint
 import glob
 import pathlib
-import multiprocessing as mp
-from multiprocessing import Manager
 import datetime
 import time
-import yaml
+import sys
 
-class CoreDataLoader():
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../..')
+from misc import mcux_read_yaml
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}')
+from data_loader import DataLoader
+
+class CoreDataLoader(DataLoader):
     def __init__(self, manifest_root_path, core_root_path):
         self.manifest_root_path = manifest_root_path
         self.core_root_path = core_root_path
@@ -21,9 +24,13 @@ class CoreDataLoader():
             ('core', 'id'),
         ]
 
-    def load(self):
-        files = self.get_device_yml_files()
-        return self.load_files_parallel(files)
+    def load(self, files=None):
+        return list(self.iter_load(files))
+
+    def iter_load(self, files=None):
+        if files is None:
+            files = self.get_device_yml_files()
+        return self.iter_files_parallel(files)
 
     def get_device_yml_files_from_directory(self, device_directory):
         p = pathlib.Path(device_directory)
@@ -40,8 +47,8 @@ class CoreDataLoader():
             files.extend(self.get_device_yml_files_from_directory(p))
         return list(sorted(set(files)))
 
-    def load_single_file(self, args):
-        filepath, shared_list, lock = args
+    def load_single_file(self, filepath):
+        data_records = list()
         data = self.load_yml(filepath)
         for device in data['device.hardware_data']['contents']['devices']:
             if 'core' in device.keys():
@@ -50,24 +57,12 @@ class CoreDataLoader():
                     data_record[('device', 'id')] = device['id']
                     data_record[('core', 'type')] = core['type']
                     data_record[('core', 'id')] = core['id']
-                    with lock:
-                        shared_list.append(data_record)
-
-    def load_files_parallel(self, files, num_processes=None):
-        if num_processes is None:
-            num_processes = mp.cpu_count()
-        with Manager() as manager:
-            shared_list = manager.list()
-            lock = manager.Lock()
-            args = [(filepath, shared_list, lock) for filepath in files]
-            with mp.Pool(processes=num_processes) as pool:
-                pool.map(self.load_single_file, args)
-            return list(shared_list)
+                    data_record[('source', 'path')] = self.source_path(filepath)
+                    data_records.append(data_record)
+        return data_records
 
     def load_yml(self, file):
-        with open(file, 'r', encoding="utf-8") as f:
-            result = yaml.safe_load(f)
-        return result
+        return mcux_read_yaml(file)
 
 if __name__ == "__main__":
     current_dir = pathlib.Path().cwd()
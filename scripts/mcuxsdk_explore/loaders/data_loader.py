@@ -0,0 +1,44 @@
+# Copyright 2025 NXP
+# SPDX-License-Identifier: BSD-3-Clause
+
+import pathlib
+import multiprocessing as mp
+
+def source_path(filepath, core_root_path):
+    '''
+    Return the path a source file is recorded with, relative to core_root_path, or the
+    file path itself if it is outside of it.
+    '''
+    try:
+        return pathlib.Path(filepath).relative_to(core_root_path).as_posix()
+    except ValueError:
+        return pathlib.Path(filepath).as_posix()
+
+class DataLoader():
+    '''
+    Base of the loaders, which parse each of their source files with load_single_file.
+    '''
+
+    def source_path(self, filepath):
+        return source_path(filepath, self.core_root_path)
+
+    def load_files_parallel(self, files, num_processes=None):
+        return list(self.iter_files_parallel(files, num_processes))
+
+    def iter_files_parallel(self, files, num_processes=None):
+        for data_records in self.imap_files_parallel(files, num_processes):
+            yield from data_records
+
+    def imap_files_parallel(self, files, num_processes=None):
+        '''
+        Yield the load_single_file result of every file, in the order they are parsed by a
+        pool of num_processes workers, all CPUs by default.
+        '''
+        if num_processes is None:
+            num_processes = mp.cpu_count()
+        if not files:
+            return
+        # Workers return their records in chunks, no shared state to synchronize
+        chunksize = max(1, len(files) // (num_processes * 4))
+        with mp.Pool(processes=num_processes) as pool:
+            yield from pool.imap_unordered(self.load_single_file, files, chunksize=chunksize)
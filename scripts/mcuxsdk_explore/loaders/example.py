@@ -4,16 +4,15 @@
 import pprint
 import sys
 import pathlib
-import multiprocessing as mp
-from multiprocessing import Manager
 import datetime
 import time
-import yaml
 
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../..')
+from misc import mcux_read_yaml
 sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}')
-import build_command as bcl
+from data_loader import DataLoader
 
-class ExampleDataLoader():
+class ExampleDataLoader(DataLoader):
     def __init__(self, manifest_root_path, core_root_path):
         self.manifest_root_path = manifest_root_path
         self.core_root_path = core_root_path
@@ -25,33 +24,30 @@ class ExampleDataLoader():
         ]
 
     def load(self, example_paths=None):
-        if example_paths:
-            pass
-        else:
-            self.build_command_data = bcl.BuildCommandDataLoader(self.manifest_root_path, self.core_root_path)
-            build_command_data = self.build_command_data.load()
-            example_paths = []
-            for x in build_command_data:
-                example_paths.append(x[('example','path')])
-            example_paths = list(sorted(set(example_paths)))
+        if not example_paths:
+            example_paths = self.get_example_paths()
         return self.load_files_parallel(example_paths)
 
-    def load_files_parallel(self, files, num_processes=None):
-        if num_processes is None:
-            num_processes = mp.cpu_count()
-        with Manager() as manager:
-            shared_list = manager.list()
-            lock = manager.Lock()
-            args = [(filepath, shared_list, lock) for filepath in files]
-            with mp.Pool(processes=num_processes) as pool:
-                pool.map(self.load_single_file, args)
-            return list(shared_list)
+    def get_example_paths(self):
+        # Every example.yml with an application or library section is an example, no target search needed
+        example_paths = list()
+        for directory in ['examples', 'examples_int']:
+            p = pathlib.Path(self.core_root_path, directory)
+            if p.is_dir():
+                example_paths.extend(f.parent.relative_to(self.core_root_path).as_posix() for f in p.glob('**/example.yml'))
+        return list(sorted(set(example_paths)))
 
-    def load_single_file(self, args):
-        example_path, shared_list, lock = args
-        with open(self.core_root_path + '/' + example_path + '/example.yml', 'r', encoding="utf-8") as file:
-            example_data = yaml.safe_load(file)
+    def iter_load(self, example_paths):
+        return self.iter_files_parallel(example_paths)
+
+    def load_single_file(self, example_path):
+        data_records = list()
+        example_data = mcux_read_yaml(pathlib.Path(self.core_root_path, example_path, 'example.yml'))
+        if example_data:
             for example_name in example_data.keys():
+                # Shared example.yml files only hold target lists
+                if not isinstance(example_data[example_name], dict):
+                    break
                 if 'section-type' not in example_data[example_name].keys():
                     break
                 if example_data[example_name]['section-type'] not in ['application', 'library']:
@@ -62,8 +58,9 @@ class ExampleDataLoader():
                 data_record[('example','category')] = example_data[example_name]['contents']['document']['category']
                 data_record[('example','name')] = example_name
                 data_record[('example','path')] = example_path
-                with lock:
-                    shared_list.append(data_record)
+                data_record[('source','path')] = example_path + '/example.yml'
+                data_records.append(data_record)
+        return data_records
 
 if __name__ == "__main__":
 
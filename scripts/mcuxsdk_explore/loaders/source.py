@@ -0,0 +1,100 @@
+# Copyright 2025 NXP
+# SPDX-License-Identifier: BSD-3-Clause
+
+import pprint
+import os
+import sys
+import pathlib
+import datetime
+import time
+
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}')
+import device as dl
+import board as bl
+import example as el
+import part as pl
+import core as cl
+from data_loader import DataLoader
+
+class SourceDataLoader(DataLoader):
+    '''
+    Walk the device and example trees once, and extract the records of all tables from
+    the found chip.yml, prj.conf and example.yml files in a single parallel pass.
+    '''
+    DEVICE_DIRECTORIES = ['devices', 'devices_int']
+    EXAMPLE_DIRECTORIES = ['examples', 'examples_int']
+
+    def __init__(self, manifest_root_path, core_root_path):
+        self.manifest_root_path = manifest_root_path
+        self.core_root_path = core_root_path
+
+        self.device_data = dl.DeviceDataLoader(manifest_root_path, core_root_path)
+        self.board_data = bl.BoardDataLoader(manifest_root_path, core_root_path)
+        self.example_data = el.ExampleDataLoader(manifest_root_path, core_root_path)
+        self.part_data = pl.PartDataLoader(manifest_root_path, core_root_path)
+        self.core_data = cl.CoreDataLoader(manifest_root_path, core_root_path)
+
+    def load(self, example_paths=None):
+        return list(self.iter_load(self.get_source_files(), example_paths))
+
+    def get_source_files(self):
+        '''
+        Return the source files by kind: 'device' for chip.yml, 'board' for the
+        _boards/<board>/prj.conf and 'example' for example.yml files.
+        '''
+        files = {'device': list(), 'board': list(), 'example': list()}
+        for directory in self.DEVICE_DIRECTORIES:
+            top = pathlib.Path(self.core_root_path, directory)
+            for dirpath, dirnames, filenames in os.walk(top):
+                if 'chip.yml' in filenames and pathlib.Path(dirpath) != top:
+                    files['device'].append(pathlib.Path(dirpath, 'chip.yml'))
+        for directory in self.EXAMPLE_DIRECTORIES:
+            top = pathlib.Path(self.core_root_path, directory)
+            for dirpath, dirnames, filenames in os.walk(top):
+                if 'example.yml' in filenames:
+                    files['example'].append(pathlib.Path(dirpath, 'example.yml'))
+                if 'prj.conf' in filenames and pathlib.Path(dirpath).parent == top / '_boards':
+                    files['board'].append(pathlib.Path(dirpath, 'prj.conf'))
+        return {kind: list(sorted(set(kind_files))) for kind, kind_files in files.items()}
+
+    def get_example_paths(self, example_files):
+        return list(sorted(set(pathlib.Path(self.source_path(filepath)).parent.as_posix() for filepath in example_files)))
+
+    def load_single_file(self, args):
+        kind, filepath = args
+        if kind == 'device':
+            return {
+                'devices': self.device_data.load_single_file(filepath),
+                'parts': self.part_data.load_single_file(filepath),
+                'cores': self.core_data.load_single_file(filepath),
+            }
+        elif kind == 'board':
+            return {'boards': self.board_data.load_single_file(filepath)}
+        return {'examples': self.example_data.load_single_file(filepath)}
+
+    def iter_load(self, source_files, example_paths=None, num_processes=None):
+        '''
+        Yield (table, records) of every chip.yml and prj.conf in source_files and of the
+        example.yml of example_paths, all example.yml files of source_files if None.
+        '''
+        if example_paths is None:
+            example_paths = self.get_example_paths(source_files.get('example', []))
+        tasks = [('device', filepath) for filepath in source_files.get('device', [])] + \
+                [('board', filepath) for filepath in source_files.get('board', [])] + \
+                [('example', example_path) for example_path in example_paths]
+        for table_records in self.imap_files_parallel(tasks, num_processes):
+            for table, records in table_records.items():
+                if records:
+                    yield table, records
+
+if __name__ == "__main__":
+    current_dir = pathlib.Path().cwd()
+    manifest_path = pathlib.Path(current_dir, '../../../../manifest')
+    core_path = pathlib.Path(current_dir, '../../../../mcuxsdk')
+
+    start_time = time.time()
+    source_data = SourceDataLoader(manifest_path, core_path)
+    data = source_data.load()
+    end_time = time.time()
+    print(f'Source data loading: {str(datetime.timedelta(seconds=end_time - start_time))}')
+    pprint.pp({table: sum(len(records) for t, records in data if t == table) for table in set(t for t, records in data)})
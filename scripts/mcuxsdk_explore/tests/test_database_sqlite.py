@@ -0,0 +1,142 @@
+# Copyright 2025 NXP
+# SPDX-License-Identifier: BSD-3-Clause
+
+import sys
+import pathlib
+
+import pytest
+
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../database')
+import database_sqlite as db_sql
+
+CHIP_YML = 'devices/chip.yml'
+
+# Tables of a small tree: two device build commands and a board one, the devices, parts
+# and cores all come from CHIP_YML
+BASE_TABLES = {
+    'build_commands': [
+        ('0', 'cmdA', 'examples/a', None, 'DEVA', 'armgcc', 'debug', 'false', None),
+        ('1', 'cmdB', 'examples/b', None, 'DEVB', 'armgcc', 'debug', 'false', None),
+        ('2', 'cmdC', 'examples/a', 'brd', None, 'armgcc', 'debug', 'false', None),
+    ],
+    'examples': [('a', 'demo_apps', 'examples/a', 'examples/a/example.yml'),
+                 ('b', 'demo_apps', 'examples/b', 'examples/b/example.yml')],
+    'boards': [('brd', 'PART2', 'examples/_boards/brd/prj.conf')],
+    'devices': [('ID1', 'DEVA full', 'DEVA', 'p', 's', 'f', 'sf', CHIP_YML)],
+    'parts': [('PART1', 'ID1', CHIP_YML)],
+    'cores': [('ID1', 'cm33', 'cm33', CHIP_YML)],
+}
+
+# New device, part and core rows of CHIP_YML
+CHIP_YML_CHANGES = {
+    'device renamed': {
+        'devices': [('ID1', 'DEVB full', 'DEVB', 'p', 's', 'f', 'sf', CHIP_YML)],
+        'parts': [('PART1', 'ID1', CHIP_YML)],
+        'cores': [('ID1', 'cm33', 'cm33', CHIP_YML)],
+    },
+    'device and part added': {
+        'devices': [('ID1', 'DEVA full', 'DEVA', 'p', 's', 'f', 'sf', CHIP_YML),
+                    ('ID2', 'DEVB full', 'DEVB', 'p', 's', 'f', 'sf', CHIP_YML)],
+        'parts': [('PART1', 'ID1', CHIP_YML), ('PART2', 'ID2', CHIP_YML)],
+        'cores': [('ID1', 'cm33', 'cm33', CHIP_YML), ('ID2', 'cm7', 'cm7', CHIP_YML)],
+    },
+    'device removed': {
+        'devices': [],
+        'parts': [],
+        'cores': [],
+    },
+}
+
+def load_tables(database_sql, tables):
+    cursor = database_sql.conn.cursor()
+    database_sql.load_build_command_rows(tables['build_commands'], cursor)
+    database_sql.load_example_rows(tables['examples'], cursor)
+    database_sql.load_board_rows(tables['boards'], cursor)
+    database_sql.load_device_rows(tables['devices'], cursor)
+    database_sql.load_part_rows(tables['parts'], cursor)
+    database_sql.load_core_rows(tables['cores'], cursor)
+    database_sql.conn.commit()
+
+def build_database(database_file_path, tables):
+    database_sql = db_sql.DataBaseSQL()
+    database_sql.initialize_database(database_file_path)
+    load_tables(database_sql, tables)
+    database_sql.create_supertable()
+    return database_sql
+
+def super_table_rows(database_sql):
+    return sorted(database_sql.conn.execute('SELECT * FROM super_table').fetchall(), key=repr)
+
+@pytest.mark.parametrize('change', list(CHIP_YML_CHANGES))
+def test_refresh_supertable_matches_full_build(tmp_path, change):
+    new_rows = CHIP_YML_CHANGES[change]
+    refreshed = build_database(tmp_path / 'refreshed.db', BASE_TABLES)
+
+    # Replace the rows of CHIP_YML and touch the keys of the old and new rows, as
+    # the refresh of a changed chip.yml does
+    touched_keys = {key: set() for key in db_sql.SUPER_TABLE_KEYS}
+    cursor = refreshed.conn.cursor()
+    for device_id, device_name in refreshed.pop_rows_by_source('devices', ('device_id', 'device_name'), [CHIP_YML], cursor):
+        touched_keys['device_id'].add(device_id)
+        touched_keys['device_name'].add(device_name)
+    for part_name, device_id in refreshed.pop_rows_by_source('parts', ('part_name', 'device_id'), [CHIP_YML], cursor):
+        touched_keys['part_name'].add(part_name)
+        touched_keys['device_id'].add(device_id)
+    for device_id, in refreshed.pop_rows_by_source('cores', ('device_id',), [CHIP_YML], cursor):
+        touched_keys['device_id'].add(device_id)
+    refreshed.load_device_rows(new_rows['devices'], cursor)
+    refreshed.load_part_rows(new_rows['parts'], cursor)
+    refreshed.load_core_rows(new_rows['cores'], cursor)
+    for row in new_rows['devices']:
+        touched_keys['device_id'].add(row[0])
+        touched_keys['device_name'].add(row[2])
+    for row in new_rows['parts']:
+        touched_keys['part_name'].add(row[0])
+        touched_keys['device_id'].add(row[1])
+    for row in new_rows['cores']:
+        touched_keys['device_id'].add(row[0])
+    refreshed.conn.commit()
+    refreshed.refresh_supertable(touched_keys)
+
+    rebuilt = build_database(tmp_path / 'rebuilt.db', {**BASE_TABLES, **new_rows})
+    assert super_table_rows(refreshed) == super_table_rows(rebuilt)
+
+def test_refresh_supertable_removed_build_command(tmp_path):
+    refreshed = build_database(tmp_path / 'refreshed.db', BASE_TABLES)
+    cursor = refreshed.conn.cursor()
+    refreshed.delete_build_command_row('cmdB', cursor)
+    refreshed.conn.commit()
+    refreshed.refresh_supertable({'raw_build_command': {'cmdB'}, 'example_path': {'examples/b'}})
+
+    rebuilt = build_database(tmp_path / 'rebuilt.db',
+                             {**BASE_TABLES, 'build_commands': BASE_TABLES['build_commands'][::2]})
+    assert super_table_rows(refreshed) == super_table_rows(rebuilt)
+
+def test_connect_partial_database(tmp_path):
+    # A build interrupted before super_table was created
+    database_sql = db_sql.DataBaseSQL()
+    database_sql.initialize_database(tmp_path / 'partial.db')
+    database_sql.begin_bulk_load()
+    database_sql.conn.close()
+
+    database_sql = db_sql.DataBaseSQL()
+    database_sql.connect(tmp_path / 'partial.db')
+    assert not database_sql.has_supertable()
+
+def test_connect_does_not_upgrade_supertable(tmp_path):
+    database_sql = build_database(tmp_path / 'legacy.db', BASE_TABLES)
+    for column in db_sql.SUPER_TABLE_INDEXES:
+        database_sql.conn.execute(f'DROP INDEX super_table_{column}')
+    database_sql.conn.execute('DROP TABLE sqlite_stat1')
+    database_sql.conn.commit()
+    database_sql.conn.close()
+
+    database_sql = db_sql.DataBaseSQL()
+    database_sql.connect(tmp_path / 'legacy.db')
+    assert database_sql.has_supertable()
+    assert not database_sql.has_supertable_indexes()
+    assert not database_sql.has_supertable_statistics()
+
+    database_sql.upgrade_supertable()
+    assert database_sql.has_supertable_indexes()
+    assert database_sql.has_supertable_statistics()
@@ -0,0 +1,19 @@
+# Copyright 2025 NXP
+# SPDX-License-Identifier: BSD-3-Clause
+
+import sys
+import pathlib
+
+import pytest
+
+sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../commands')
+import query_command as q
+
+def test_parse_filters_merges_columns():
+    request = q.parse_filters(['board_name=frdmk64f, frdmk22f', 'toolchain=armgcc', 'board_name=mcxn947'])
+    assert request == {'board_name': ['frdmk64f', 'frdmk22f', 'mcxn947'], 'toolchain': ['armgcc']}
+
+@pytest.mark.parametrize('item', ['board_name', '=frdmk64f', 'board_name=', 'board_name=,', 'board_name= , '])
+def test_parse_filters_invalid(item):
+    with pytest.raises(ValueError):
+        q.parse_filters([item])
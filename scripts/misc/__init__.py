@@ -3,9 +3,22 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import os, sys
+import copy
 import logging
 import yaml, json
 
+try:
+    # Use the C LibYAML parser if available, it's much faster than the pure Python one
+    from yaml import CSafeLoader as MCUXSafeLoader
+    MCUX_YAML_BACKEND = 'libyaml'
+except ImportError:
+    from yaml import SafeLoader as MCUXSafeLoader
+    MCUX_YAML_BACKEND = 'python'
+
+# Parsed yaml documents of this process, keyed by absolute path and validated by (mtime, size)
+_yaml_cache = {}
+_yaml_cache_stats = {'hits': 0, 'misses': 0}
+
 def mcux_log_init(log_level=logging.DEBUG):
     logging.basicConfig(level=log_level, format='%(message)s')
 
@@ -25,11 +38,43 @@ def mcux_debug(msg):
     logging.debug(f'DEBUG: {msg}')
 
 # File/Json/Yaml read/write
-def mcux_read_yaml(file_path):
-    if not os.path.exists(file_path):
+def mcux_yaml_backend():
+    '''Return the yaml parser backend in use, 'libyaml' or 'python'.'''
+    return MCUX_YAML_BACKEND
+
+def mcux_load_yaml(stream):
+    return yaml.load(stream, Loader=MCUXSafeLoader)
+
+def mcux_read_yaml(file_path, cached=True):
+    '''
+    Read a yaml file with the fastest available safe loader.
+
+    With cached=True the parsed document is memoized per process by (path, mtime, size),
+    every caller gets its own copy of it and may modify it.
+    '''
+    try:
+        stat = os.stat(file_path)
+    except OSError:
         return None
-    with open(file_path, 'r') as file:
-        return yaml.safe_load(file)
+    cache_key = os.path.abspath(file_path)
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    if cached and (entry := _yaml_cache.get(cache_key)) and entry[0] == fingerprint:
+        _yaml_cache_stats['hits'] += 1
+        return copy.deepcopy(entry[1])
+    _yaml_cache_stats['misses'] += 1
+    with open(file_path, 'r', encoding='utf-8') as file:
+        data = mcux_load_yaml(file)
+    if cached:
+        _yaml_cache[cache_key] = (fingerprint, data)
+        return copy.deepcopy(data)
+    return data
+
+def mcux_yaml_cache_info():
+    return {'backend': MCUX_YAML_BACKEND, 'entries': len(_yaml_cache), **_yaml_cache_stats}
+
+def mcux_yaml_cache_clear():
+    _yaml_cache.clear()
+    _yaml_cache_stats.update({'hits': 0, 'misses': 0})
 
 def mcux_write_yaml(file_path, data, is_create_dir=False):
     if is_create_dir and os.path.dirname(file_path):
@@ -6,6 +6,12 @@ import os, sys
 import yaml, json
 import glob
 import re
+import heapq
+import contextlib
+import hashlib
+import pickle
+import subprocess
+import multiprocessing as mp
 from pathlib import Path
 
 script_dir = os.path.abspath(os.path.dirname(__file__))
@@ -20,14 +26,37 @@ DEFINITION_YAL_SCHEMA = 'definitions_schema.json'
 
 SUPPORTED_TOOLCHAINS = ['armgcc', 'iar', 'mdk', 'xcc', 'xtensa', 'codewarrior', 'riscvllvm']
 
+TARGET_STR_PATTERN = re.compile(r'(?P<prefix>[+-]?)(?P<toolchain>[a-z]+)@(?P<target>.+)')
+
+EXAMPLE_INDEX_VERSION = 1
+EXAMPLE_INDEX_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mcuxsdk')
+
 logger = logging.getLogger(__name__)
 
 class MCUXProjectData(object):
+    # Exported fields, in the order of as_dict()
+    FIELDS = ('name', 'board', 'device', 'shield', 'core_id', 'toolchain', 'target', 'project_file', 'category', 'extra_build_args')
+    # Slots instead of a per-instance dict, the build commands are computed once and cached
+    __slots__ = tuple(f'_{field}' for field in FIELDS) + ('_use_sysbuild', '_build_cmd', '_build_cmd_pretty')
+    # Project dirs already checked for existence
+    CHECKED_PROJECT_DIRS = set()
+
     def __init__(self):
-        self.raw = {}
+        self._build_cmd = None
+        self._build_cmd_pretty = None
+
+    def _set(self, field, value):
+        # Board, toolchain, target, category... repeat a lot among the targets, share the strings
+        setattr(self, f'_{field}', sys.intern(value) if isinstance(value, str) else value)
+        self._build_cmd = None
+        self._build_cmd_pretty = None
+
+    @property
+    def raw(self):
+        return {field: getattr(self, f'_{field}') for field in self.FIELDS if hasattr(self, f'_{field}')}
 
     def as_dict(self):
-        export_dict = self.raw.copy()
+        export_dict = self.raw
         export_dict['build_cmd'] = self.build_cmd
         return export_dict
 
@@ -62,65 +91,65 @@ class MCUXProjectData(object):
 
     @property
     def board(self):
-        return self.raw.get('board')
+        return getattr(self, '_board', None)
 
     @board.setter
     def board(self, value):
-        self.raw['board'] = value
+        self._set('board', value)
 
     @property
     def device(self):
-        return self.raw.get('device')
+        return getattr(self, '_device', None)
 
     @device.setter
     def device(self, value):
-        self.raw['device'] = value
+        self._set('device', value)
 
     @property
     def shield(self):
-        return self.raw.get('shield')
+        return getattr(self, '_shield', None)
 
     @shield.setter
     def shield(self, value):
-        self.raw['shield'] = value
+        self._set('shield', value)
 
     @property
     def name(self):
-        return self.raw.get('name', '')
+        return getattr(self, '_name', '')
 
     @name.setter
     def name(self, value):
-        self.raw['name'] = value
+        self._set('name', value)
 
     @property
     def core_id(self):
-        return self.raw.get('core_id', '')
+        return getattr(self, '_core_id', '')
 
     @core_id.setter
     def core_id(self, value):
-        self.raw['core_id'] = value
+        self._set('core_id', value)
 
     @property
     def target(self):
-        return self.raw.get('target', '')
+        return getattr(self, '_target', '')
 
     @target.setter
     def target(self, value):
         if value:
-            self.raw['target'] = value
+            self._set('target', value)
 
     @property
     def toolchain(self):
-        return self.raw.get('toolchain', '')
+        return getattr(self, '_toolchain', '')
 
     @toolchain.setter
     def toolchain(self, value):
         if value in SUPPORTED_TOOLCHAINS:
-            self.raw['toolchain'] = value
+            self._set('toolchain', value)
 
     @property
     def project_file(self):
-        return self.raw.get('project_file', '')
+        return getattr(self, '_project_file', '')
 
     @project_file.setter
     def project_file(self, value):
@@ -131,29 +160,39 @@ class MCUXProjectData(object):
             path_to_store = value
         else:
             # Treat as relative to sdk_root_dir
-            abs_path = os.path.join(sdk_root_dir, value)
-            if not os.path.exists(abs_path):
-                raise ValueError(f"Project path {abs_path} does not exist")
+            if value not in self.CHECKED_PROJECT_DIRS:
+                abs_path = os.path.join(sdk_root_dir, value)
+                if not os.path.exists(abs_path):
+                    raise ValueError(f"Project path {abs_path} does not exist")
+                self.CHECKED_PROJECT_DIRS.add(value)
             path_to_store = value  # Keep it relative
 
-        self.raw['project_file'] = path_to_store.replace('\\', '/')
+        self._set('project_file', path_to_store.replace('\\', '/'))
 
 
     @property
     def category(self):
-        return self.raw.get('category', '')
+        return getattr(self, '_category', '')
 
     @category.setter
     def category(self, value):
-        self.raw['category'] = value
+        self._set('category', value)
 
     @property
     def extra_build_args(self):
-        return self.raw.get('extra_build_args', [])
+        return getattr(self, '_extra_build_args', [])
 
     @extra_build_args.setter
     def extra_build_args(self, value: list):
-        self.raw['extra_build_args'] = value
+        self._set('extra_build_args', value)
+
+    @property
+    def use_sysbuild(self):
+        return self._use_sysbuild
+
+    @use_sysbuild.setter
+    def use_sysbuild(self, value):
+        self._set('use_sysbuild', value)
 
     @property
     def build_cmd_board_device_core(self):
@@ -171,10 +210,14 @@ class MCUXProjectData(object):
     @property
     def build_cmd_pretty(self):
         # FIXME not sure the usage of this api
-        return f'west build -p always{" --sysbuild" if self.use_sysbuild else ""} {self.project_file} --toolchain {self.toolchain:6} --config {self.target:10} {self.build_cmd_board_device_core:0}'
+        if self._build_cmd_pretty is None:
+            self._build_cmd_pretty = f'west build -p always{" --sysbuild" if self.use_sysbuild else ""} {self.project_file} --toolchain {self.toolchain:6} --config {self.target:10} {self.build_cmd_board_device_core:0}'
+        return self._build_cmd_pretty
 
     @property
     def build_cmd(self):
+        if self._build_cmd is not None:
+            return self._build_cmd
         args = ['west', 'build', '-p', 'always']
         # Keep order with original api
         if self.use_sysbuild:
@@ -182,12 +225,245 @@ class MCUXProjectData(object):
         args.extend([self.project_file, '--toolchain', self.toolchain, '--config', self.target, self.build_cmd_board_device_core])
         if self.extra_build_args:
             args.extend(self.extra_build_args)
-        return ' '.join(args)
+        self._build_cmd = ' '.join(args)
+        return self._build_cmd
 
     @property
     def board_core(self):
         return self.board + ('@' + self.core_id if self.core_id else '')
 
+class MCUXExampleIndex(object):
+    '''
+    On-disk index of parsed example.yml files.
+
+    Each entry is keyed by the absolute file path and stores the parsed content
+    together with the mtime and size of the file, so only files changed since the
+    last run are parsed again. Entries of deleted files are evicted on save.
+    '''
+    def __init__(self, index_file=None):
+        super().__init__()
+        self.index_file = index_file or self.default_index_file()
+        self.entries = {}
+        self.visited = set()
+        self.updates = {}
+        self.is_dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def default_index_file():
+        digest = hashlib.md5(sdk_root_dir.encode('utf-8')).hexdigest()[0:7]
+        return os.path.join(EXAMPLE_INDEX_DIR, f'example_index_{digest}.pickle').replace('\\', '/')
+
+    def load(self):
+        self.entries = {}
+        if not os.path.isfile(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'rb') as file:
+                index_data = pickle.load(file)
+            if index_data.get('version') == EXAMPLE_INDEX_VERSION and index_data.get('sdk_root_dir') == sdk_root_dir:
+                self.entries = index_data['entries']
+        except Exception as e:
+            # A corrupted index is simply rebuilt
+            logger.debug(f"Discard example index {self.index_file}: {e}")
+            self.entries = {}
+        logger.debug(f"Loaded {len(self.entries)} entries from example index {self.index_file}")
+
+    def clear(self):
+        self.entries = {}
+        self.is_dirty = True
+
+    def read_yaml(self, file_path):
+        file_path = os.path.abspath(file_path).replace('\\', '/')
+        self.visited.add(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            if self.entries.pop(file_path, None) is not None:
+                self.updates[file_path] = None
+                self.is_dirty = True
+            return None
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(file_path)
+        if entry and entry[0] == fingerprint:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        # The index itself keeps the parsed document, no need to memoize it twice
+        data = mcux_read_yaml(file_path, cached=False)
+        self.entries[file_path] = (fingerprint, data)
+        self.updates[file_path] = self.entries[file_path]
+        self.is_dirty = True
+        return data
+
+    def take_updates(self):
+        '''Return and reset the entries changed in this process, used to merge worker results.'''
+        updates = (self.updates, self.visited, self.hits, self.misses)
+        self.updates, self.visited, self.hits, self.misses = {}, set(), 0, 0
+        return updates
+
+    def merge_updates(self, updates):
+        entries, visited, hits, misses = updates
+        for file_path, entry in entries.items():
+            if entry is None:
+                self.entries.pop(file_path, None)
+            else:
+                self.entries[file_path] = entry
+            self.is_dirty = True
+        self.visited.update(visited)
+        self.hits += hits
+        self.misses += misses
+
+    def save(self):
+        # Evict entries of files which are gone, files seen in this run are known to exist
+        for file_path in [path for path in self.entries if path not in self.visited]:
+            if not os.path.exists(file_path):
+                del self.entries[file_path]
+                self.is_dirty = True
+        logger.debug(f"Example index: {self.hits} hits, {self.misses} parsed, {len(self.entries)} entries")
+        if not self.is_dirty:
+            return
+        index_data = {
+            'version': EXAMPLE_INDEX_VERSION,
+            'sdk_root_dir': sdk_root_dir,
+            'entries': self.entries
+        }
+        try:
+            if os.path.dirname(self.index_file):
+                os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            # Write to a temporary file first so concurrent runs never read a partial index
+            temp_file = f'{self.index_file}.{os.getpid()}.tmp'
+            with open(temp_file, 'wb') as file:
+                pickle.dump(index_data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, self.index_file)
+            self.is_dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to save example index {self.index_file}: {e}")
+
+class MCUXFilter(object):
+    '''
+    Compiled include/exclude filter for one dimension, see MCUXAppTargets.config_filter for the format.
+
+    Exact filters are kept in frozensets and regex filters are combined into one precompiled
+    alternation, the result is cached per input string.
+    '''
+    def __init__(self, in_filter_list=[], exclude_filter_list=[]):
+        super().__init__()
+        self.has_include = bool(in_filter_list)
+        self.include_exact, self.include_regex = self._compile(in_filter_list)
+        self.exclude_exact, self.exclude_regex = self._compile(exclude_filter_list)
+        self.results = {}
+
+    @staticmethod
+    def _compile(filter_list):
+        exact = frozenset(item for item in filter_list if not item.startswith('r@'))
+        patterns = [re.compile(item[2:]) for item in filter_list if item.startswith('r@')]
+        if len(patterns) > 1 and not any(pattern.groups for pattern in patterns):
+            # Numbered groups would be renumbered by the alternation, only combine plain patterns
+            try:
+                patterns = [re.compile('|'.join(f'(?:{pattern.pattern})' for pattern in patterns))]
+            except re.error:
+                # Inline global flags like (?i) are only valid at the start of a pattern
+                pass
+        return exact, patterns
+
+    @staticmethod
+    def _is_matched(input_string, exact, patterns):
+        return input_string in exact or any(pattern.search(input_string) for pattern in patterns)
+
+    def match(self, input_string: str) -> bool:
+        if (ret := self.results.get(input_string)) is None:
+            ret = self.results[input_string] = \
+                (not self.has_include or self._is_matched(input_string, self.include_exact, self.include_regex)) \
+                and not self._is_matched(input_string, self.exclude_exact, self.exclude_regex)
+        return ret
+
+class MCUXChangeSet(object):
+    '''
+    Files changed since a git revision, used to keep only the targets affected by a change.
+
+    An app target is affected when a file in its app dir or in its board/device specific dir
+    (examples/_boards/<board>/<app dir>) changed, or when one of the shared example.yml files
+    its targets are resolved from changed, see MCUXAppTargets.inject_targets_from_defaults.
+    Any change of the internal target data affects all targets.
+    '''
+    def __init__(self, changed_files=[]):
+        super().__init__()
+        self.norm_paths = {}
+        self.changed_files = frozenset(self.norm_path(file) for file in changed_files)
+        changed_dirs = set()
+        for file in self.changed_files:
+            parent = os.path.dirname(file)
+            while parent not in changed_dirs and parent != os.path.dirname(parent):
+                changed_dirs.add(parent)
+                parent = os.path.dirname(parent)
+        self.changed_dirs = frozenset(changed_dirs)
+        self.is_all_affected = self.is_path_affected(os.path.join(sdk_root_dir, INTERNAL_MODULE_PATH))
+        # Without changed example.yml or board/device specific files, only the changed app dirs need to be expanded
+        self.has_shared_changes = any(os.path.basename(file) == 'example.yml' for file in self.changed_files) \
+            or self.is_path_affected(os.path.join(sdk_root_dir, 'examples/_boards')) \
+            or self.is_path_affected(os.path.join(sdk_root_dir, 'examples/_devices'))
+
+    @staticmethod
+    def _git(repo_dir, *args, check=True):
+        try:
+            ret = subprocess.run(['git', '-C', repo_dir, *args], capture_output=True, text=True)
+        except OSError as e:
+            raise RuntimeError(f"Failed to run git: {e}")
+        if ret.returncode != 0:
+            if check:
+                raise RuntimeError(f"git {' '.join(args)} failed in {repo_dir}: {ret.stderr.strip()}")
+            return None
+        return ret.stdout
+
+    @classmethod
+    def from_git(cls, rev, search_dirs):
+        '''
+        Collect the files changed since rev in the git repositories containing search_dirs,
+        including uncommitted and untracked files. Repositories where rev does not exist are skipped.
+        '''
+        repo_dirs = []
+        for search_dir in search_dirs:
+            if not os.path.isdir(search_dir):
+                continue
+            toplevel = cls._git(search_dir, 'rev-parse', '--show-toplevel', check=False)
+            if toplevel and toplevel.strip() not in repo_dirs:
+                repo_dirs.append(toplevel.strip())
+        changed_files = []
+        matched_repos = 0
+        for repo_dir in repo_dirs:
+            if cls._git(repo_dir, 'rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}', check=False) is None:
+                logger.warning(f"Revision {rev} not found in {repo_dir}, skip it")
+                continue
+            matched_repos += 1
+            # Renames are reported as delete + add so both paths are taken into account
+            changed = cls._git(repo_dir, 'diff', '--name-only', '--no-renames', rev, '--').splitlines()
+            changed += cls._git(repo_dir, 'ls-files', '--others', '--exclude-standard').splitlines()
+            logger.debug(f"{len(changed)} files changed since {rev} in {repo_dir}")
+            changed_files.extend(os.path.join(repo_dir, file) for file in changed if file)
+        if not matched_repos:
+            raise RuntimeError(f"Revision {rev} not found in any git repository of {', '.join(search_dirs)}")
+        return cls(changed_files)
+
+    def norm_path(self, path):
+        if (norm_path := self.norm_paths.get(path)) is None:
+            norm_path = self.norm_paths[path] = os.path.realpath(path).replace('\\', '/')
+        return norm_path
+
+    def is_path_affected(self, path):
+        '''Whether path is a changed file or a directory containing changed files.'''
+        path = self.norm_path(path)
+        return path in self.changed_dirs or path in self.changed_files
+
+    def is_any_changed(self, files):
+        return any(self.norm_path(file) in self.changed_files for file in files)
+
+    def filter_example_files(self, example_files):
+        if self.is_all_affected or self.has_shared_changes:
+            return example_files
+        return [file for file in example_files if self.is_path_affected(os.path.dirname(file))]
+
 class MCUXAppTargets(object):
     BOARD_DEF_TARGETS = {}
     DEVICE_DEF_TARGETS = {}
@@ -203,11 +479,35 @@ class MCUXAppTargets(object):
     DEVICES_FILTER = []
     DEVICES_EXCLUDE_FILTER = []
 
+    TOOLCHAINS_MATCHER = MCUXFilter()
+    TARGETS_MATCHER = MCUXFilter()
+    BOARDS_MATCHER = MCUXFilter()
+    SHIELDS_MATCHER = MCUXFilter()
+    DEVICES_MATCHER = MCUXFilter()
+
     INT_EXAMPLE_DATA = {}
 
+    # Resolved default targets keyed by (instance_core, category, instance_type), built once per process
+    RESOLVED_DEF_TARGETS = {}
+    # Shared example.yml files consulted to resolve RESOLVED_DEF_TARGETS, same keys
+    RESOLVED_DEF_FILES = {}
+    # Parsed target strings, '+armgcc@debug' -> ('armgcc@debug', True)
+    PARSED_TARGET_STRS = {}
+
+    # Only list targets affected by these changes if set, see MCUXChangeSet
+    CHANGE_SET = None
+
+    EXAMPLE_INDEX = None
+
+    # Built on first use by get_example_validator, not shared with worker processes
+    EXAMPLE_VALIDATOR = None
+    # Schema validation results, errors are {'file', 'pointer', 'message'} dicts
+    VALIDATION_REPORT = {'files': 0, 'errors': []}
+
     def __init__(self):
         super().__init__()
         self.tgt_dict = {}
+        self.consulted_files = []
 
     def reset_targets(self):
         self.tgt_dict = {}
@@ -227,6 +527,61 @@ class MCUXAppTargets(object):
         except Exception:
             # reset if encounter any exception
             pass
+        MCUXAppTargets.RESOLVED_DEF_TARGETS = {}
+        MCUXAppTargets.RESOLVED_DEF_FILES = {}
+
+    @classmethod
+    def export_config(cls):
+        '''Snapshot of the class level configuration, used to set up worker processes.'''
+        return {
+            'BOARD_DEF_TARGETS': cls.BOARD_DEF_TARGETS,
+            'DEVICE_DEF_TARGETS': cls.DEVICE_DEF_TARGETS,
+            'INT_EXAMPLE_DATA': cls.INT_EXAMPLE_DATA,
+            'RESOLVED_DEF_TARGETS': cls.RESOLVED_DEF_TARGETS,
+            'RESOLVED_DEF_FILES': cls.RESOLVED_DEF_FILES,
+            'PARSED_TARGET_STRS': cls.PARSED_TARGET_STRS,
+            'TOOLCHAINS_FILTER': cls.TOOLCHAINS_FILTER,
+            'TOOLCHAINS_EXCLUDE_FILTER': cls.TOOLCHAINS_EXCLUDE_FILTER,
+            'TARGETS_FILTER': cls.TARGETS_FILTER,
+            'TARGETS_EXCLUDE_FILTER': cls.TARGETS_EXCLUDE_FILTER,
+            'BOARDS_FILTER': cls.BOARDS_FILTER,
+            'BOARDS_EXCLUDE_FILTER': cls.BOARDS_EXCLUDE_FILTER,
+            'SHIELDS_FILTER': cls.SHIELDS_FILTER,
+            'SHIELDS_EXCLUDE_FILTER': cls.SHIELDS_EXCLUDE_FILTER,
+            'DEVICES_FILTER': cls.DEVICES_FILTER,
+            'DEVICES_EXCLUDE_FILTER': cls.DEVICES_EXCLUDE_FILTER,
+            'TOOLCHAINS_MATCHER': cls.TOOLCHAINS_MATCHER,
+            'TARGETS_MATCHER': cls.TARGETS_MATCHER,
+            'BOARDS_MATCHER': cls.BOARDS_MATCHER,
+            'SHIELDS_MATCHER': cls.SHIELDS_MATCHER,
+            'DEVICES_MATCHER': cls.DEVICES_MATCHER,
+            'EXAMPLE_INDEX': cls.EXAMPLE_INDEX,
+            'CHANGE_SET': cls.CHANGE_SET,
+        }
+
+    @classmethod
+    def import_config(cls, config):
+        for attr, value in config.items():
+            setattr(cls, attr, value)
+
+    @classmethod
+    def config_example_index(cls, index_file=None, rebuild=False):
+        cls.EXAMPLE_INDEX = MCUXExampleIndex(index_file)
+        if rebuild:
+            cls.EXAMPLE_INDEX.clear()
+        else:
+            cls.EXAMPLE_INDEX.load()
+
+    @classmethod
+    def save_example_index(cls):
+        if cls.EXAMPLE_INDEX is not None:
+            cls.EXAMPLE_INDEX.save()
+
+    @classmethod
+    def read_example_yml(cls, file_path):
+        if cls.EXAMPLE_INDEX is not None:
+            return cls.EXAMPLE_INDEX.read_yaml(file_path)
+        return mcux_read_yaml(file_path)
 
     @classmethod
     def config_filter(cls, toolchains_filter=[], boards_filter=[], shields_filter=[], targets_filter=[], devices_filter=[]):
@@ -259,6 +614,12 @@ class MCUXAppTargets(object):
             cls.DEVICES_FILTER = [item for item in devices_filter if not item.startswith('e@')]
             cls.DEVICES_EXCLUDE_FILTER = [item[2:] for item in devices_filter if item.startswith('e@')]
 
+        cls.TOOLCHAINS_MATCHER = MCUXFilter(cls.TOOLCHAINS_FILTER, cls.TOOLCHAINS_EXCLUDE_FILTER)
+        cls.TARGETS_MATCHER = MCUXFilter(cls.TARGETS_FILTER, cls.TARGETS_EXCLUDE_FILTER)
+        cls.BOARDS_MATCHER = MCUXFilter(cls.BOARDS_FILTER, cls.BOARDS_EXCLUDE_FILTER)
+        cls.SHIELDS_MATCHER = MCUXFilter(cls.SHIELDS_FILTER, cls.SHIELDS_EXCLUDE_FILTER)
+        cls.DEVICES_MATCHER = MCUXFilter(cls.DEVICES_FILTER, cls.DEVICES_EXCLUDE_FILTER)
+
         logger.debug(f'Create Filters')
         logger.debug(f'  Toolchains Include: ' + ', '.join(cls.TOOLCHAINS_FILTER))
         logger.debug(f'  Toolchains Exclude: ' + ', '.join(cls.TOOLCHAINS_EXCLUDE_FILTER))
@@ -271,30 +632,41 @@ class MCUXAppTargets(object):
         logger.debug(f'  Targets Include: ' + ', '.join(cls.TARGETS_FILTER))
         logger.debug(f'  Targets Exclude: ' + ', '.join(cls.TARGETS_EXCLUDE_FILTER))
 
-    def inject_target(self, target_str: str):
-        match = re.match(r'(?P<prefix>[+-]?)(?P<toolchain>[a-z]+)@(?P<target>.+)', target_str)
+    @classmethod
+    def parse_target(cls, target_str: str):
+        if target_str in cls.PARSED_TARGET_STRS:
+            return cls.PARSED_TARGET_STRS[target_str]
+        match = TARGET_STR_PATTERN.match(target_str)
         if not match:
             logger.debug(f"Invalid target {target_str}")
-            return None
-        action = match.group('prefix')
-        toolchain = match.group('toolchain')
-        target = match.group('target')
-        toolchain_target = f"{toolchain}@{target}"
-
-        if action in ['+', '']:
-            self.tgt_dict[toolchain_target] = True
-        elif action in ['-']:
-            self.tgt_dict[toolchain_target] = False
+            parsed = None
         else:
-            raise RuntimeError(f"Invalid action {action} in {target_str}")
+            action = match.group('prefix')
+            toolchain_target = f"{match.group('toolchain')}@{match.group('target')}"
+            if action in ['+', '']:
+                parsed = (toolchain_target, True)
+            elif action in ['-']:
+                parsed = (toolchain_target, False)
+            else:
+                raise RuntimeError(f"Invalid action {action} in {target_str}")
+        cls.PARSED_TARGET_STRS[target_str] = parsed
+        return parsed
+
+    def inject_target(self, target_str: str):
+        parsed = self.parse_target(target_str)
+        if not parsed:
+            return None
+        toolchain_target, is_enabled = parsed
+        self.tgt_dict[toolchain_target] = is_enabled
 
     def inject_targets_from_shared_file(self, name, shared_file, instance_type):
+        self.consulted_files.append(shared_file)
         instance_def_targets = getattr(self, f'{instance_type.upper()}_DEF_TARGETS')
         if name not in instance_def_targets.keys():
             if not os.path.exists(shared_file):
                 instance_def_targets[name] = []
             else:
-                instance_def_targets[name] = mcux_read_yaml(shared_file).get(f'{instance_type}.toolchains', [])
+                instance_def_targets[name] = self.read_example_yml(shared_file).get(f'{instance_type}.toolchains', [])
 
         for toolchain_target in instance_def_targets[name]:
             self.inject_target(toolchain_target)
@@ -327,6 +699,56 @@ class MCUXAppTargets(object):
             instance_type
         )
 
+    def inject_targets_from_defaults(self, instance_core, category, instance_type):
+        '''
+        Inject the targets shared by all apps of the same instance core and category:
+        instance default, instance category and app category targets.
+        The resolved result is built once per process and reused by all app x instance pairs,
+        together with the shared files it was resolved from.
+        '''
+        key = (instance_core, category, instance_type)
+        if (resolved := MCUXAppTargets.RESOLVED_DEF_TARGETS.get(key)) is None:
+            self.reset_targets()
+            self.consulted_files = []
+            instance = re.sub(r'@.*$', '', instance_core)
+            self.inject_targets_from_instance_default(instance_core, instance_type)
+            self.inject_targets_from_instance_category(instance, category, instance_type)
+            self.inject_targets_from_app_category(category, instance_type)
+            resolved = MCUXAppTargets.RESOLVED_DEF_TARGETS[key] = self.tgt_dict
+            MCUXAppTargets.RESOLVED_DEF_FILES[key] = tuple(self.consulted_files)
+        self.tgt_dict = resolved.copy()
+        self.consulted_files = MCUXAppTargets.RESOLVED_DEF_FILES[key]
+
+    def is_instance_affected(self, app_dir, instance, instance_type):
+        '''
+        Whether the targets of app_dir on instance are affected by CHANGE_SET,
+        must be called after inject_targets_from_defaults.
+        '''
+        change_set = MCUXAppTargets.CHANGE_SET
+        if change_set is None or change_set.is_all_affected:
+            return True
+        app_dir_path = os.path.join(sdk_root_dir, app_dir)
+        if change_set.is_path_affected(app_dir_path):
+            return True
+        # Board/device specific files of the app, e.g. examples/_boards/<board>/demo_apps/hello_world
+        app_dir_rel = os.path.relpath(app_dir_path, os.path.join(sdk_root_dir, 'examples')).replace('\\', '/')
+        if not app_dir_rel.startswith('..') and \
+            change_set.is_path_affected(os.path.join(sdk_root_dir, f'examples/_{instance_type}s/{instance}', app_dir_rel)):
+            return True
+        return change_set.is_any_changed(self.consulted_files)
+
+    @classmethod
+    def get_consulted_files(cls):
+        '''
+        Return the shared example.yml files the targets resolved so far depend on, and the
+        files of the internal module, existing or not: a shared file which appears later
+        changes the targets too.
+        '''
+        consulted_files = set(file for files in cls.RESOLVED_DEF_FILES.values() for file in files)
+        if os.path.isdir(internal_module := os.path.join(sdk_root_dir, INTERNAL_MODULE_PATH)):
+            consulted_files.update(glob.glob(os.path.join(internal_module, '*')))
+        return sorted(consulted_files)
+
     def inject_targets_from_app(self, app_instance_core_target_delta):
         for toolchain_target in app_instance_core_target_delta:
             self.inject_target(toolchain_target)
@@ -341,46 +763,22 @@ class MCUXAppTargets(object):
         Returns:
             bool: True means at least one filter matches the input string. False means no filter matches the input string
         """
-        ret = False
-        # Filter for the include
-        if in_filter_list:
-            for filter in in_filter_list:
-                if filter.startswith('r@') and re.search(filter[2:], input_string):
-                    ret = True
-                    break
-                elif filter == input_string:
-                    ret = True
-                    break
-        else:
-            ret = True
-        if not ret:
-            # logger.debug(f'Filtered out {input_string} by include')
-            return False
-        # Continue to filter for the exclude if not filtered out by the include filter
-        if exclude_filter_list:
-            for filter in exclude_filter_list:
-                if filter.startswith('r@') and re.search(filter[2:], input_string):
-                    # logger.debug(f'Filtered out {input_string} by exclude')
-                    return False
-                elif filter == input_string:
-                    # logger.debug(f'Filtered out {input_string} by exclude')
-                    return False
-        return True
+        return MCUXFilter(in_filter_list, exclude_filter_list).match(input_string)
 
     def filter_target(self, target):
-        return self.do_filter(target, self.TARGETS_FILTER, self.TARGETS_EXCLUDE_FILTER)
+        return self.TARGETS_MATCHER.match(target)
 
     def filter_toolchain(self, toolchain):
-        return self.do_filter(toolchain, self.TOOLCHAINS_FILTER, self.TOOLCHAINS_EXCLUDE_FILTER)
+        return self.TOOLCHAINS_MATCHER.match(toolchain)
 
     def filter_board_core(self, board_core):
-        return self.do_filter(board_core, self.BOARDS_FILTER, self.BOARDS_EXCLUDE_FILTER)
+        return self.BOARDS_MATCHER.match(board_core)
 
     def filter_device_core(self, device_core):
-        return self.do_filter(device_core, self.DEVICES_FILTER, self.DEVICES_EXCLUDE_FILTER)
+        return self.DEVICES_MATCHER.match(device_core)
 
     def filter_shield(self, shield):
-        return self.do_filter(shield, self.SHIELDS_FILTER, self.SHIELDS_EXCLUDE_FILTER)
+        return self.SHIELDS_MATCHER.match(shield)
 
     def get_app_targets(self, app_example_file: str, is_pick_one_target_for_app=False, validate=False) -> list:
         apps = []
@@ -394,9 +792,11 @@ class MCUXAppTargets(object):
             app_dir = str(app_dir_path)
 
         try:
-            example_data = mcux_read_yaml(app_example_file)
+            example_data = self.read_example_yml(app_example_file)
         except Exception as e:
             print(f"{app_example_file} is not a valid YAML file: {e}")
+            if validate:
+                self.add_validation_errors(app_example_file, [{'file': app_example_file, 'pointer': '', 'message': f'Invalid YAML: {e}'}])
             return apps
         if validate:
             self._validate_example_data(app_example_file, example_data)
@@ -439,13 +839,11 @@ class MCUXAppTargets(object):
         for instance_core, instance_core_delta_data in instance_data.items():
             if not getattr(self, f'filter_{instance_type}_core')(instance_core):
                 continue
-            self.reset_targets()
-
             instance, core_id = instance_core.split('@') if '@' in instance_core else (instance_core, '')
             # Parse the targets
-            self.inject_targets_from_instance_default(instance_core, instance_type)
-            self.inject_targets_from_instance_category(instance, app_category, instance_type)
-            self.inject_targets_from_app_category(app_category, instance_type)
+            self.inject_targets_from_defaults(instance_core, app_category, instance_type)
+            if not self.is_instance_affected(app_dir, instance, instance_type):
+                continue
             if app_toolchains:
                 self.inject_targets_from_app(app_toolchains)
             if instance_core_delta_data:
@@ -473,26 +871,143 @@ class MCUXAppTargets(object):
                 if is_pick_one_target_for_app:
                     break
 
+    @classmethod
+    def get_example_validator(cls):
+        '''The example.yml schema validator, built once per process.'''
+        if cls.EXAMPLE_VALIDATOR is None:
+            import jsonschema as js
+            example_schema = mcux_read_json((Path(sdk_root_dir) / SCHEMA_DIR / EXAMPLE_YML_SCHEMA).as_posix())
+            definition_schema = mcux_read_json((Path(sdk_root_dir) / SCHEMA_DIR / DEFINITION_YAL_SCHEMA).as_posix())
+            schema_store = {
+                example_schema['$id']: example_schema,
+                definition_schema['$id']: definition_schema,
+            }
+            resolver = js.RefResolver.from_schema(example_schema, store=schema_store)
+            cls.EXAMPLE_VALIDATOR = js.Draft7Validator(example_schema, resolver=resolver)
+        return cls.EXAMPLE_VALIDATOR
+
+    @classmethod
+    def add_validation_errors(cls, example_yml, errors):
+        cls.VALIDATION_REPORT['files'] += 1
+        for error in errors:
+            logger.error(example_yml + ': ' + (f"{error['pointer']}: " if error['pointer'] else '') + error['message'])
+        cls.VALIDATION_REPORT['errors'].extend(errors)
+
+    @classmethod
+    def take_validation_report(cls):
+        '''Return and reset the validation report of this process, used to merge worker results.'''
+        report, cls.VALIDATION_REPORT = cls.VALIDATION_REPORT, {'files': 0, 'errors': []}
+        return report
+
+    @classmethod
+    def merge_validation_report(cls, report):
+        cls.VALIDATION_REPORT['files'] += report['files']
+        cls.VALIDATION_REPORT['errors'].extend(report['errors'])
+
     def _validate_example_data(self, example_yml, example_data):
-        import jsonschema as js
-        example_schema = mcux_read_json((Path(sdk_root_dir) / SCHEMA_DIR / EXAMPLE_YML_SCHEMA).as_posix())
-        definition_schema = mcux_read_json((Path(sdk_root_dir) / SCHEMA_DIR / DEFINITION_YAL_SCHEMA).as_posix())
-        schema_store = {
-            example_schema['$id']: example_schema,
-            definition_schema['$id']: definition_schema,
-        }
-        resolver = js.RefResolver.from_schema(example_schema, store=schema_store)
-        try:
-            js.Draft7Validator(example_schema, resolver=resolver).validate(example_data)
-        except js.ValidationError as e:
-            logger.error(example_yml + ': ' + e.message)
+        errors = []
+        for e in sorted(self.get_example_validator().iter_errors(example_data), key=lambda e: list(map(str, e.absolute_path))):
+            # RFC 6901 JSON pointer of the failed element
+            pointer = ''.join('/' + str(part).replace('~', '~0').replace('/', '~1') for part in e.absolute_path)
+            errors.append({'file': example_yml, 'pointer': pointer, 'message': e.message})
+        self.add_validation_errors(example_yml, errors)
+        return errors
+
+def _init_search_worker(app_targets_config):
+    MCUXAppTargets.import_config(app_targets_config)
+    if MCUXAppTargets.EXAMPLE_INDEX is not None:
+        # Only report what is changed by this worker back to the parent
+        MCUXAppTargets.EXAMPLE_INDEX.take_updates()
+    MCUXAppTargets.take_validation_report()
+
+def _search_example_file(args):
+    example_file, is_pick_one_target_for_app, validate = args
+    logger.debug(f"Found example file {example_file}")
+    apps = MCUXAppTargets().get_app_targets(example_file, is_pick_one_target_for_app, validate)
+    index_updates = MCUXAppTargets.EXAMPLE_INDEX.take_updates() if MCUXAppTargets.EXAMPLE_INDEX is not None else None
+    validation_report = MCUXAppTargets.take_validation_report() if validate else None
+    return apps, index_updates, validation_report
+
+class MCUXAppsWriter(object):
+    '''
+    Write matched apps to a .json, .jsonl, .yml or .robot file one by one as they are found.
+
+    The .json and .yml output is the same as dumping the whole list at once, .jsonl writes one
+    json object per line so consumers can start processing before the search is done.
+    '''
+    SUPPORTED_FORMATS = ('.json', '.jsonl', '.yml', '.robot')
+
+    def __init__(self, export_file):
+        super().__init__()
+        self.export_file = export_file
+        self.file = None
+        self.count = 0
+
+    @classmethod
+    def is_supported(cls, export_file):
+        return bool(export_file) and export_file.endswith(cls.SUPPORTED_FORMATS)
+
+    def __enter__(self):
+        if os.path.dirname(self.export_file):
+            os.makedirs(os.path.dirname(self.export_file), exist_ok=True)
+        self.file = open(self.export_file, 'w')
+        if self.export_file.endswith('.json'):
+            self.file.write('[')
+        elif self.export_file.endswith('.robot'):
+            # Write Settings
+            self.file.write('*** Settings ***\n')
+            self.file.write('Library           OperatingSystem\n')
+            self.file.write('Library           Process\n\n')
+
+            # Write Variables
+            self.file.write('*** Variables ***\n')
+            self.file.write(f'${{SDK_ROOT_DIR}}    ' + sdk_root_dir + '\n\n')
+
+            # Write Test Cases
+            self.file.write('*** Test Cases ***\n')
+        return self
+
+    def write(self, app):
+        if self.export_file.endswith('.json'):
+            # Same layout as json.dump(apps, indent=4)
+            item = json.dumps(app.as_dict(), indent=4).replace('\n', '\n    ')
+            self.file.write(('\n    ' if not self.count else ',\n    ') + item)
+        elif self.export_file.endswith('.jsonl'):
+            self.file.write(json.dumps(app.as_dict()) + '\n')
+        elif self.export_file.endswith('.yml'):
+            yaml.dump([app.as_dict()], self.file, default_flow_style=False, sort_keys=False)
+        elif self.export_file.endswith('.robot'):
+            self.file.write(f'Test {app.name} Build' + '\n')
+            self.file.write(f'    [Tags]    {app.name}    {app.board_core}    {app.category}    {app.toolchain}    {app.target}' + '\n')
+            self.file.write(f'    ${{app_result}}=    Run Process    {app.build_cmd}    shell=True    cwd=${{SDK_ROOT_DIR}}    timeout=5 minutes' + '\n')  # Execute build_cmd in sdk_root_dir
+            self.file.write('    Log    ${{app_result.stdout}}\n')
+            self.file.write('    Log    ${{app_result.stderr}}\n')
+            self.file.write('    Should Be Equal As Integers    ${{app_result.rc}}    0\n\n')
+        self.file.flush()
+        self.count += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.export_file.endswith('.json'):
+            self.file.write('\n]' if self.count else ']')
+        elif self.export_file.endswith('.yml') and not self.count:
+            yaml.dump([], self.file, default_flow_style=False, sort_keys=False)
+        self.file.close()
+        if exc_type is None:
+            logger.info(f"-- Exported {self.count} matched apps to {self.export_file}")
+        return False
 
 class MCUXRepoProjects(object):
 
     def __init__(self):
         super().__init__()
 
-    def search_app_targets(
+    def search_app_targets(self, app_path, *args, **kwargs):
+        '''Return the list of matched apps, see iter_app_targets for the arguments.'''
+        matched_apps = list(self.iter_app_targets(app_path, *args, **kwargs))
+        logger.debug(f"Found {len(matched_apps)} matched apps in total")
+        return matched_apps
+
+    def iter_app_targets(
             self,
             app_path,
             board_cores_filter=[],
@@ -501,9 +1016,14 @@ class MCUXRepoProjects(object):
             toolchains_filter=[],
             targets_filter=[],
             is_pick_one_target_for_app=False,
-            validate=False):
-        matched_apps = []
-
+            validate=False,
+            jobs=1,
+            example_files=None):
+        '''
+        Same as search_app_targets, but yield the matched apps as soon as each example.yml is expanded.
+        example_files are the example.yml files under app_path, relative to the SDK root, when the
+        caller has already found them. app_path is searched for example.yml files if None.
+        '''
         # Setup filter
         MCUXAppTargets.config_filter(
             toolchains_filter=toolchains_filter,
@@ -512,16 +1032,19 @@ class MCUXRepoProjects(object):
             devices_filter=devices_filter,
             targets_filter=targets_filter,
         )
+        if example_files is not None:
+            expanded_example_files = [os.path.join(sdk_root_dir, example_file) for example_file in example_files]
         # Explicit example.yml
-        if app_path.endswith('example.yml'):
+        elif app_path.endswith('example.yml'):
             if not os.path.exists(example_yml := os.path.join(sdk_root_dir, app_path)):
-                return matched_apps
+                return
             expanded_example_files = [example_yml]
         else:
             # Search for app targets
             example_file_pattern = os.path.join(sdk_root_dir, app_path , '**/example.yml')
             expanded_example_files = glob.glob(example_file_pattern, recursive=True)
-        expanded_example_files = list(set(expanded_example_files))
+        # Sorted so that the output order is the same from run to run
+        expanded_example_files = sorted(set(expanded_example_files))
         expanded_example_files_filtered = []
         for example_file in expanded_example_files:
             example_path = Path(example_file)
@@ -533,51 +1056,116 @@ class MCUXRepoProjects(object):
             except ValueError:
                 pass
             expanded_example_files_filtered.append(example_file)
+        if MCUXAppTargets.CHANGE_SET is not None:
+            expanded_example_files_filtered = MCUXAppTargets.CHANGE_SET.filter_example_files(expanded_example_files_filtered)
 
         # logger.debug(f"Searching app targets in {example_file_pattern}")
-        for example_file in expanded_example_files_filtered:
-            #print(example_file)
-            logger.debug(f"Found example file {example_file}")
-            app_target_op = MCUXAppTargets()
-            matched_apps.extend(app_target_op.get_app_targets(example_file, is_pick_one_target_for_app, validate))
-        logger.debug(f"Found {len(matched_apps)} matched apps in total")
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and len(expanded_example_files_filtered) > 1:
+            yield from self._iter_example_files_parallel(expanded_example_files_filtered, is_pick_one_target_for_app, validate, jobs)
+        else:
+            for example_file in expanded_example_files_filtered:
+                #print(example_file)
+                logger.debug(f"Found example file {example_file}")
+                app_target_op = MCUXAppTargets()
+                yield from app_target_op.get_app_targets(example_file, is_pick_one_target_for_app, validate)
 
-        return matched_apps
+    def _iter_example_files_parallel(self, example_files, is_pick_one_target_for_app, validate, jobs):
+        '''
+        Expand example files in a process pool. Results are yielded in the order of example_files,
+        so the output is the same as the serial search.
+        '''
+        jobs = min(jobs, len(example_files))
+        args = [(example_file, is_pick_one_target_for_app, validate) for example_file in example_files]
+        chunksize = max(1, len(args) // (jobs * 4))
+        logger.debug(f"Searching {len(args)} example files with {jobs} jobs")
+        with mp.Pool(processes=jobs, initializer=_init_search_worker, initargs=(MCUXAppTargets.export_config(),)) as pool:
+            for apps, index_updates, validation_report in pool.imap(_search_example_file, args, chunksize=chunksize):
+                if index_updates is not None:
+                    MCUXAppTargets.EXAMPLE_INDEX.merge_updates(index_updates)
+                if validation_report is not None:
+                    MCUXAppTargets.merge_validation_report(validation_report)
+                yield from apps
+
+    SHARD_BY = ('app', 'board', 'toolchain', 'weight')
+
+    @staticmethod
+    def _shard_key(app, shard_by):
+        if shard_by == 'app':
+            return app.project_file
+        elif shard_by == 'board':
+            return (app.board or app.device) + ('@' + app.core_id if app.core_id else '')
+        elif shard_by == 'toolchain':
+            return app.toolchain
+        return app.build_cmd
+
+    def shard_apps(self, apps, shard_index, shard_count, shard_by='app', build_weights=None):
+        '''
+        Return the apps of shard shard_index (1-based) out of shard_count.
+
+        Apps are grouped by shard_by, so an app dir, board or toolchain is never split
+        between shards, 'weight' shards single targets. The groups are assigned heaviest
+        first to the least loaded shard, the weight of a target is its build time in
+        build_weights keyed by build_cmd, or the average build time if unknown.
+        The assignment does not depend on the input order, so independent runs get
+        disjoint shards covering all apps. Apps keep their order within the shard.
+        '''
+        assert(1 <= shard_index <= shard_count)
+        assert(shard_by in self.SHARD_BY)
+        build_weights = build_weights or {}
+        default_weight = sum(build_weights.values()) / len(build_weights) if build_weights else 1
+        group_weights = {}
+        for app in apps:
+            key = self._shard_key(app, shard_by)
+            group_weights[key] = group_weights.get(key, 0) + build_weights.get(app.build_cmd, default_weight)
+
+        shard_loads = [(0, idx) for idx in range(shard_count)]
+        shard_of_group = {}
+        for key, weight in sorted(group_weights.items(), key=lambda item: (-item[1], item[0])):
+            load, idx = heapq.heappop(shard_loads)
+            shard_of_group[key] = idx
+            heapq.heappush(shard_loads, (load + weight, idx))
+        for load, idx in sorted(shard_loads, key=lambda item: item[1]):
+            logger.debug(f"Shard {idx + 1}/{shard_count}: weight {load:.1f}")
+
+        return [app for app in apps if shard_of_group[self._shard_key(app, shard_by)] == shard_index - 1]
 
     def dump_to_file(self, export_file, apps):
-        if export_file and export_file.endswith('.json'):
-            mcux_write_json(export_file, [item.as_dict() for item in apps], is_create_dir=True)
-            logger.info(f"-- Exported {len(apps)} matched apps to {export_file}")
-        elif export_file and export_file.endswith('.yml'):
-            mcux_write_yaml(export_file, [item.as_dict() for item in apps], is_create_dir=True)
-            logger.info(f"-- Exported {len(apps)} matched apps to {export_file}")
-        elif export_file and export_file.endswith('.robot'):
-            with open(export_file, 'w') as file:
-                # Write Settings
-                file.write('*** Settings ***\n')
-                file.write('Library           OperatingSystem\n')
-                file.write('Library           Process\n\n')
-
-                # Write Variables
-                file.write('*** Variables ***\n')
-                file.write(f'${{SDK_ROOT_DIR}}    ' + sdk_root_dir + '\n\n')
-
-                # Write Test Cases
-                file.write('*** Test Cases ***\n')
-                for app in apps:
-                    file.write(f'Test {app.name} Build' + '\n')
-                    file.write(f'    [Tags]    {app.name}    {app.board_core}    {app.category}    {app.toolchain}    {app.target}' + '\n')
-                    file.write(f'    ${{app_result}}=    Run Process    {app.build_cmd}    shell=True    cwd=${{SDK_ROOT_DIR}}    timeout=5 minutes' + '\n')  # Execute build_cmd in sdk_root_dir
-                    file.write('    Log    ${{app_result.stdout}}\n')
-                    file.write('    Log    ${{app_result.stderr}}\n')
-                    file.write('    Should Be Equal As Integers    ${{app_result.rc}}    0\n\n')
-        else:
+        if not MCUXAppsWriter.is_supported(export_file):
             logger.error(f"Invalid export file {export_file}")
+            return
+        with MCUXAppsWriter(export_file) as writer:
+            for app in apps:
+                writer.write(app)
+
+    def stream_apps(self, apps, export_file=None, list_format='none'):
+        '''
+        Export and list the apps one by one while they are found. The apps are yielded again,
+        so the caller decides whether to keep them.
+        '''
+        if export_file and not MCUXAppsWriter.is_supported(export_file):
+            logger.error(f"Invalid export file {export_file}")
+            export_file = None
+        with MCUXAppsWriter(export_file) if export_file else contextlib.nullcontext() as writer:
+            for idx, app in enumerate(apps):
+                if writer is not None:
+                    writer.write(app)
+                if list_format == 'silent_cmd':
+                    self.silent_print_app(app)
+                elif list_format == 'cmd':
+                    self.pretty_print_app(idx, app)
+                yield app
+
+    def pretty_print_app(self, idx, app):
+        logger.info(f"[{idx+1:4}][{app.build_cmd}]")
 
     def pretty_print_apps(self, apps):
         for idx, app in enumerate(apps):
-            logger.info(f"[{idx+1:4}][{app.build_cmd}]")
+            self.pretty_print_app(idx, app)
+
+    def silent_print_app(self, app):
+        print(app.build_cmd, flush=True)
 
     def silent_print_apps(self, apps):
         for app in apps:
-            print(app.build_cmd)
+            self.silent_print_app(app)
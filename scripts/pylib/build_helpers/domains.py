@@ -54,6 +54,14 @@ mapping:
     type: seq
     sequence:
       - type: str
+  build_dependencies:
+    required: false
+    type: map
+    mapping:
+      regex;(\S+):
+        type: seq
+        sequence:
+          - type: str
   name_mapping:
     required: false
     type: map
@@ -97,6 +105,17 @@ class Domains:
         self._default_domain = self.get_domain(data['default'])
         self._flash_order = self.get_domains(data.get('flash_order', []))
 
+        # The build order and dependencies come from the add_dependencies() of
+        # the images, which may name targets that are not domains.
+        self._build_order = [name for name in data.get('build_order') or []
+                             if name in self._domains]
+        self._build_dependencies = None
+        if 'build_dependencies' in data:
+            self._build_dependencies = {
+                name: [dep for dep in deps or [] if dep in self._domains]
+                for name, deps in (data['build_dependencies'] or {}).items()
+            }
+
     @staticmethod
     def from_file(domains_file):
         '''Load domains from a domains.yaml file.
@@ -131,6 +150,26 @@ class Domains:
             exit(1)
         return found
 
+    def get_build_order(self, names=None):
+        '''Return the domains, all by default, sorted in build order.
+        '''
+        domains = self.get_domains(names)
+        return sorted(domains, key=lambda d: self._build_order.index(d.name)
+                      if d.name in self._build_order else len(self._build_order))
+
+    def get_build_dependencies(self, name):
+        '''Return the names of the domains to build before domain name.
+
+        A domains.yaml without build dependencies only gives the build order,
+        every domain then depends on the ones before it.
+        '''
+        self.get_domain(name)
+        if self._build_dependencies is None:
+            if name not in self._build_order:
+                return list(self._build_order)
+            return self._build_order[:self._build_order.index(name)]
+        return list(self._build_dependencies.get(name, []))
+
     def get_default_domain(self):
         return self._default_domain
 
@@ -4,6 +4,7 @@
 # Copyright (c) 2018 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import os
 import re
 from collections import OrderedDict
 
@@ -101,6 +102,35 @@ class CMakeCacheEntry:
         return fmt.format(self.name, self.value)
 
 
+# Parsed entries of the cache files by path and line parser, with the
+# (mtime, size) of the file they were parsed from
+_parsed_caches = {}
+
+
+def parse_cache_file(cache_file, parse_line, encoding=None):
+    '''Return an OrderedDict of the entries of cache_file by name, parsed
+    with parse_line(line, line_no).
+
+    The file is parsed again only if it changed since it was last parsed
+    with parse_line, in this process. The returned dict is a copy, entries
+    may be set or deleted in it. zcmake shares this with twister.
+    '''
+    stat = os.stat(cache_file)
+    key = (os.path.abspath(cache_file), parse_line)
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    parsed = _parsed_caches.get(key)
+    if parsed is None or parsed[0] != fingerprint:
+        entries = []
+        with open(cache_file, 'r', encoding=encoding) as cache:
+            for line_no, line in enumerate(cache):
+                entry = parse_line(line, line_no)
+                if entry:
+                    entries.append(entry)
+        parsed = (fingerprint, OrderedDict((e.name, e) for e in entries))
+        _parsed_caches[key] = parsed
+    return OrderedDict(parsed[1])
+
+
 class CMakeCache:
     '''Parses and represents a CMake cache file.'''
 
@@ -113,13 +143,7 @@ class CMakeCache:
         self.load(cache_file)
 
     def load(self, cache_file):
-        entries = []
-        with open(cache_file, 'r') as cache:
-            for line_no, line in enumerate(cache):
-                entry = CMakeCacheEntry.from_line(line, line_no)
-                if entry:
-                    entries.append(entry)
-        self._entries = OrderedDict((e.name, e) for e in entries)
+        self._entries = parse_cache_file(cache_file, CMakeCacheEntry.from_line)
 
     def get(self, name, default=None):
         entry = self._entries.get(name)
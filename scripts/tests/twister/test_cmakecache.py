@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# Copyright 2025 NXP
+#
+# SPDX-License-Identifier: Apache-2.0
+
+'''
+Tests for the memoized parsing of twisterlib/cmakecache.py
+'''
+
+import os
+import sys
+
+ZEPHYR_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+sys.path.insert(0, os.path.join(ZEPHYR_BASE, 'scripts', 'pylib', 'twister'))
+
+from twisterlib import cmakecache
+from twisterlib.cmakecache import CMakeCache, CMakeCacheEntry
+
+
+def count_parsed_lines(monkeypatch):
+    parsed_lines = []
+    from_line = CMakeCacheEntry.from_line
+
+    def counting_from_line(line, line_no):
+        parsed_lines.append(line)
+        return from_line(line, line_no)
+
+    monkeypatch.setattr(CMakeCacheEntry, 'from_line', counting_from_line)
+    return parsed_lines
+
+
+def test_unchanged_cache_is_parsed_once(tmp_path, monkeypatch):
+    parsed_lines = count_parsed_lines(monkeypatch)
+    cache_file = tmp_path / 'CMakeCache.txt'
+    cache_file.write_text('BOARD:STRING=frdmk64f\n')
+
+    first = CMakeCache.from_file(str(cache_file))
+    second = CMakeCache.from_file(str(cache_file))
+
+    assert len(parsed_lines) == 1
+    assert first.get('BOARD') == second.get('BOARD') == 'frdmk64f'
+
+
+def test_rewritten_cache_is_parsed_again(tmp_path, monkeypatch):
+    parsed_lines = count_parsed_lines(monkeypatch)
+    cache_file = tmp_path / 'CMakeCache.txt'
+    cache_file.write_text('BOARD:STRING=frdmk64f\n')
+    assert CMakeCache.from_file(str(cache_file)).get('BOARD') == 'frdmk64f'
+
+    # Same size, only the modification time tells the files apart
+    cache_file.write_text('BOARD:STRING=frdmk66f\n')
+    stat = os.stat(cache_file)
+    os.utime(cache_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    assert CMakeCache.from_file(str(cache_file)).get('BOARD') == 'frdmk66f'
+    assert len(parsed_lines) == 2
+
+
+def test_instances_do_not_share_entries(tmp_path):
+    cache_file = tmp_path / 'CMakeCache.txt'
+    cache_file.write_text('BOARD:STRING=frdmk64f\nCORE:STRING=cm4\n')
+
+    first = CMakeCache.from_file(str(cache_file))
+    del first['CORE']
+
+    assert 'CORE' in CMakeCache.from_file(str(cache_file))
+    assert len(cmakecache.parse_cache_file(str(cache_file), CMakeCacheEntry.from_line)) == 2
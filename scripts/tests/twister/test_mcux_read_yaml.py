@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# Copyright 2025 NXP
+#
+# SPDX-License-Identifier: Apache-2.0
+
+'''
+Tests for the memoized yaml reading of misc/__init__.py
+'''
+
+import os
+import sys
+
+ZEPHYR_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+sys.path.insert(0, os.path.join(ZEPHYR_BASE, 'scripts'))
+
+import misc
+
+
+def test_read_yaml_memoized(tmp_path):
+    misc.mcux_yaml_cache_clear()
+    yml = tmp_path / 'example.yml'
+    yml.write_text('app:\n  boards:\n    frdmk64f: [+armgcc@debug]\n')
+
+    assert misc.mcux_read_yaml(yml) == {'app': {'boards': {'frdmk64f': ['+armgcc@debug']}}}
+    assert misc.mcux_read_yaml(yml) == {'app': {'boards': {'frdmk64f': ['+armgcc@debug']}}}
+    assert misc.mcux_yaml_cache_info()['misses'] == 1
+    assert misc.mcux_yaml_cache_info()['hits'] == 1
+
+
+def test_read_yaml_modified_result(tmp_path):
+    misc.mcux_yaml_cache_clear()
+    yml = tmp_path / 'example.yml'
+    yml.write_text('app:\n  boards:\n    frdmk64f: [+armgcc@debug]\n')
+
+    # Neither the first nor a memoized result are shared with later callers
+    for _ in range(2):
+        data = misc.mcux_read_yaml(yml)
+        data['app']['boards']['frdmk64f'].append('+iar@debug')
+        data['other'] = {}
+    assert misc.mcux_read_yaml(yml) == {'app': {'boards': {'frdmk64f': ['+armgcc@debug']}}}
+
+
+def test_read_yaml_changed_file(tmp_path):
+    misc.mcux_yaml_cache_clear()
+    yml = tmp_path / 'example.yml'
+    yml.write_text('app: {}\n')
+    assert misc.mcux_read_yaml(yml) == {'app': {}}
+
+    yml.write_text('app: {other: 1}\n')
+    assert misc.mcux_read_yaml(yml) == {'app': {'other': 1}}
+    assert misc.mcux_read_yaml(tmp_path / 'missing.yml') is None
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# Copyright 2025 NXP
+#
+# SPDX-License-Identifier: Apache-2.0
+
+'''
+Tests for the change set selection and the sharding of misc/sdk_project_target.py
+'''
+
+import os
+import sys
+import random
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+ZEPHYR_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..')
+sys.path.insert(0, os.path.join(ZEPHYR_BASE, 'scripts'))
+
+from misc import sdk_project_target as spt
+from misc.sdk_project_target import MCUXAppTargets, MCUXChangeSet, MCUXRepoProjects
+
+APPS = ['demo_apps/app0', 'demo_apps/app1', 'demo_apps/app2']
+BOARDS = ['brd_a', 'brd_b']
+
+
+def write_yaml(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        yaml.safe_dump(data, f)
+
+
+@pytest.fixture
+def sdk_root(tmp_path, monkeypatch):
+    '''A small SDK tree with APPS on BOARDS, the class level state is restored afterwards.'''
+    root = str(tmp_path.resolve()).replace('\\', '/')
+    for board in BOARDS:
+        write_yaml(f'{root}/examples/_boards/{board}/example.yml', {'board.toolchains': ['+armgcc@debug', '+iar@release']})
+    write_yaml(f'{root}/examples/demo_apps/example.yml', {'board.toolchains': ['+armgcc@release']})
+    for app in APPS:
+        name = app.replace('/', '_')
+        write_yaml(f'{root}/examples/{app}/example.yml',
+                   {name: {'section-type': 'application',
+                           'contents': {'document': {'category': 'demo_apps'}},
+                           'boards': {board: [] for board in BOARDS}}})
+        with open(f'{root}/examples/{app}/main.c', 'w') as f:
+            f.write('int main(){}\n')
+
+    monkeypatch.setattr(spt, 'sdk_root_dir', root)
+    monkeypatch.setattr(spt.MCUXProjectData, 'CHECKED_PROJECT_DIRS', set())
+    for attr in ['BOARD_DEF_TARGETS', 'DEVICE_DEF_TARGETS', 'INT_EXAMPLE_DATA', 'RESOLVED_DEF_TARGETS', 'RESOLVED_DEF_FILES']:
+        monkeypatch.setattr(MCUXAppTargets, attr, {})
+    monkeypatch.setattr(MCUXAppTargets, 'EXAMPLE_INDEX', None)
+    monkeypatch.setattr(MCUXAppTargets, 'CHANGE_SET', None)
+    return root
+
+
+def search(root, changed_files=None):
+    '''Return (app dir, board, toolchain, target) of the apps affected by changed_files, all apps if None.'''
+    MCUXAppTargets.RESOLVED_DEF_TARGETS = {}
+    MCUXAppTargets.RESOLVED_DEF_FILES = {}
+    if changed_files is not None:
+        MCUXAppTargets.CHANGE_SET = MCUXChangeSet([f'{root}/{file}' for file in changed_files])
+    apps = MCUXRepoProjects().search_app_targets('examples', board_cores_filter=['r@.'])
+    return [(app.project_file, app.board, app.toolchain, app.target) for app in apps]
+
+
+def test_change_set_without_changes(sdk_root):
+    assert search(sdk_root, []) == []
+
+
+@pytest.mark.parametrize('changed_file', [
+    'examples/demo_apps/example.yml',
+    'examples_int/scripts/list_project/list_project_mod.py',
+])
+def test_change_set_all_affected(sdk_root, changed_file):
+    all_apps = search(sdk_root)
+    assert len(all_apps) == len(APPS) * len(BOARDS) * 3
+    assert search(sdk_root, [changed_file]) == all_apps
+
+
+def test_change_set_shared_board_file(sdk_root):
+    all_apps = search(sdk_root)
+    assert search(sdk_root, ['examples/_boards/brd_a/example.yml']) == \
+        [app for app in all_apps if app[1] == 'brd_a']
+
+
+@pytest.mark.parametrize('changed_file', [
+    'examples/demo_apps/app1/main.c',
+    'examples/demo_apps/app1/example.yml',
+])
+def test_change_set_app_change(sdk_root, changed_file):
+    all_apps = search(sdk_root)
+    assert search(sdk_root, [changed_file]) == \
+        [app for app in all_apps if app[0] == 'examples/demo_apps/app1']
+
+
+def test_change_set_board_specific_app_change(sdk_root):
+    all_apps = search(sdk_root)
+    assert search(sdk_root, ['examples/_boards/brd_b/demo_apps/app2/board.c']) == \
+        [app for app in all_apps if app[0] == 'examples/demo_apps/app2' and app[1] == 'brd_b']
+
+
+def make_apps():
+    return [SimpleNamespace(project_file=f'examples/{app}/example.yml', board=board, device=None, core_id='',
+                            toolchain=toolchain, build_cmd=f'west build -b {board} examples/{app} --toolchain {toolchain}')
+            for app in [f'demo_apps/app{i}' for i in range(7)]
+            for board in ['brd_a', 'brd_b', 'brd_c']
+            for toolchain in ['armgcc', 'iar']]
+
+
+@pytest.mark.parametrize('shard_by', MCUXRepoProjects.SHARD_BY)
+@pytest.mark.parametrize('shard_count', [1, 2, 3, 5])
+def test_shard_apps_cover(shard_by, shard_count):
+    op = MCUXRepoProjects()
+    apps = make_apps()
+    weights = {app.build_cmd: random.Random(app.build_cmd).uniform(10, 300) for app in apps}
+    shuffled = apps[:]
+    random.Random(shard_count).shuffle(shuffled)
+
+    shards = [op.shard_apps(apps, idx, shard_count, shard_by, weights) for idx in range(1, shard_count + 1)]
+    # A disjoint cover of the apps, each shard keeps the order of the apps
+    assert sorted(app.build_cmd for shard in shards for app in shard) == sorted(app.build_cmd for app in apps)
+    for shard in shards:
+        assert shard == [app for app in apps if app in shard]
+    # Independent runs get the same shards whatever the order of the apps
+    for idx, shard in enumerate(shards, 1):
+        assert op.shard_apps(shuffled, idx, shard_count, shard_by, weights) == [app for app in shuffled if app in shard]
+    # A group is never split between shards
+    for shard in shards:
+        keys = set(op._shard_key(app, shard_by) for app in shard)
+        assert all(op._shard_key(app, shard_by) not in keys for other in shards if other is not shard for app in other)
+
+
+def test_shard_apps_balanced():
+    op = MCUXRepoProjects()
+    apps = make_apps()
+    weights = {app.build_cmd: random.Random(app.build_cmd).uniform(10, 300) for app in apps}
+    loads = [sum(weights[app.build_cmd] for app in op.shard_apps(apps, idx, 4, 'weight', weights)) for idx in range(1, 5)]
+    # Heaviest first to the least loaded shard, the shards differ by at most one target
+    assert max(loads) - min(loads) <= max(weights.values())
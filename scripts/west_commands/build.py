@@ -9,17 +9,24 @@ import pathlib
 import shlex
 import sys
 import yaml
+import json
 import hashlib
 import shutil
 import re
 import datetime
 import ctypes
+import contextlib
+import itertools
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from west import log
 from west.configuration import config
-from zcmake import DEFAULT_CMAKE_GENERATOR, run_cmake, run_build, CMakeCache
+from zcmake import DEFAULT_CMAKE_GENERATOR, run_cmake, run_build, cmake_command, CMakeCache
 from build_helpers import is_mcux_build, find_build_dir, load_domains, is_from_same_disk, \
-                          FIND_BUILD_DIR_DESCRIPTION
+                          get_jobserver, FIND_BUILD_DIR_DESCRIPTION
 
 from zephyr_ext_common import Forceable
 
@@ -36,7 +43,8 @@ BUILD_USAGE = '''\
 west build [-h] [-b BOARD[@REV]]] [-d BUILD_DIR]
            [-t TARGET] [-p {auto, always, never}] [-c] [--cmake-only]
            [-n] [-o BUILD_OPT] [-f]
-           [--sysbuild | --no-sysbuild] [--domain DOMAIN]
+           [--sysbuild | --no-sysbuild] [--domain DOMAIN] [--parallel-domains]
+           [--matrix [--matrix-jobs N] [--ccache]]
            [source_dir] -- [cmake_opt [cmake_opt ...]]
 '''
 
@@ -65,6 +73,36 @@ _CMAKE_FALSE = "FALSE"
 
 NO_GUI_TOOLCHAIN = ['armgcc']
 
+# Default build types resolved without --config, cached outside of the build directories
+# so pristine builds reuse them too
+DEFAULT_BUILD_TYPE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mcuxsdk', 'default_build_types')
+# CMake options the default build type is resolved from
+DEFAULT_BUILD_TYPE_OPTIONS = ['sdkrootdirpath', 'board', 'core_id', 'shield', 'device', 'config_toolchain']
+
+# Inputs of the last successful build, to skip a build with nothing to do
+BUILD_MANIFEST = 'west_build_manifest.json'
+# Environment variables the board and device may come from
+BUILD_MANIFEST_ENV = ['BOARD', 'DEVICE']
+
+MATRIX_DESCRIPTION = '''\
+With --matrix, --toolchain and --config may be given several times, or as
+comma separated lists, and every toolchain/config combination is built from
+the same source dir in <build_dir>/<toolchain>_<config>. The combinations are
+configured concurrently, at most --matrix-jobs at a time or as many as the
+calling make job server allows, then built one after the other as the build
+tool already uses all the CPUs. Each output line is prefixed with its
+combination, the configure and build times are reported at the end.'''
+
+# Options replaced in the west build command line of every matrix combination,
+# with their number of values
+MATRIX_OPTIONS = {'--matrix': 0, '--matrix-jobs': 1, '--ccache': 0,
+                  '--toolchain': 1, '--config': 1, '-d': 1, '--build-dir': 1}
+# Options which run CMake again, dropped once the combination is configured
+MATRIX_CMAKE_OPTIONS = {'-c': 0, '--cmake': 0, '--cmake-only': 0, '-p': '?', '--pristine': '?',
+                        '-S': 1, '--snippet': 1}
+# Toolchains whose compilers ccache supports
+CCACHE_TOOLCHAINS = ['armgcc', 'zephyr']
+
 # log module is deprecated
 def _banner(msg):
     log.inf('=== west build: ' + msg, colorize=True)
@@ -95,6 +133,92 @@ def _append_invocation_log(build_dir, line):
         # Best-effort; ignore logging failures
         pass
 
+def _file_fingerprint(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _default_build_type_cache_file(cache_key):
+    digest = hashlib.md5(json.dumps(cache_key, sort_keys=True).encode('utf-8')).hexdigest()
+    return os.path.join(DEFAULT_BUILD_TYPE_CACHE_DIR, f'{digest}.json')
+
+def _read_default_build_type_cache(cache_key):
+    '''
+    Return the default build type cached for cache_key if none of its input files changed
+    since it was resolved, None otherwise.
+    '''
+    try:
+        with open(_default_build_type_cache_file(cache_key), 'r') as f_input:
+            cache = json.load(f_input)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get('key') != cache_key:
+        return None
+    for file_path, fingerprint in cache.get('files', {}).items():
+        if _file_fingerprint(file_path) != fingerprint:
+            return None
+    return cache.get('build_type')
+
+def _write_default_build_type_cache(cache_key, input_files, build_type):
+    cache = {
+        'key': cache_key,
+        'files': {file_path: _file_fingerprint(file_path) for file_path in sorted(set(input_files))},
+        'build_type': build_type,
+    }
+    cache_file = _default_build_type_cache_file(cache_key)
+    try:
+        os.makedirs(DEFAULT_BUILD_TYPE_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so concurrent builds never read a partial cache
+        temp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(temp_file, 'w') as f_output:
+            json.dump(cache, f_output, indent=4)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+
+def _file_digest(file_path):
+    try:
+        with open(file_path, 'rb') as f_input:
+            return hashlib.sha256(f_input.read()).hexdigest()
+    except OSError:
+        return None
+
+def _read_build_manifest(build_dir, manifest_key):
+    '''
+    Return the manifest of the last build in build_dir if it was run with the same
+    manifest_key and neither its CMake cache nor its input files changed since, None
+    otherwise.
+    '''
+    try:
+        with open(os.path.join(build_dir, BUILD_MANIFEST), 'r') as f_input:
+            manifest = json.load(f_input)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('key') != manifest_key:
+        return None
+    if manifest.get('cmake_cache') != _file_digest(os.path.join(build_dir, 'CMakeCache.txt')):
+        return None
+    for file_path, fingerprint in manifest.get('files', {}).items():
+        if _file_fingerprint(file_path) != fingerprint:
+            return None
+    return manifest
+
+def _write_build_manifest(build_dir, manifest_key, input_files, make_program, seconds):
+    manifest = {
+        'key': manifest_key,
+        'cmake_cache': _file_digest(os.path.join(build_dir, 'CMakeCache.txt')),
+        'files': {file_path: _file_fingerprint(file_path) for file_path in sorted(set(input_files))},
+        'make_program': make_program,
+        'seconds': seconds,
+    }
+    try:
+        with open(os.path.join(build_dir, BUILD_MANIFEST), 'w') as f_output:
+            json.dump(manifest, f_output, indent=4)
+    except OSError:
+        pass
+
 def config_get(option, fallback):
     return config.get('build', option, fallback=fallback)
 
@@ -106,6 +230,56 @@ class AlwaysIfMissing(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         setattr(namespace, self.dest, values or 'always')
 
+class StoreAndCollect(argparse.Action):
+    '''Store the value like 'store', and collect the comma separated values of every
+    occurrence of the option in the <dest>s list, used by --matrix.'''
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, values)
+        collected = list(getattr(namespace, self.dest + 's', None) or [])
+        collected.extend(value for value in values.split(',') if value and value not in collected)
+        setattr(namespace, self.dest + 's', collected)
+
+def _strip_options(argv, options):
+    '''Remove options, given as {option: number of values or '?'}, from argv up to "--".'''
+    stripped = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == _ARG_SEPARATOR:
+            return stripped + argv[i:]
+        if arg in options:
+            if options[arg] == '?':
+                # Optional value, like -p [auto|always|never]
+                if i + 1 < len(argv) and argv[i + 1] in ['auto', 'always', 'never']:
+                    i += 1
+            else:
+                i += options[arg]
+        elif arg.startswith('--') and arg.split('=', 1)[0] in options:
+            # --option=value
+            pass
+        elif not arg.startswith('--') and arg[:2] in options and options[arg[:2]]:
+            # -oVALUE
+            pass
+        else:
+            stripped.append(arg)
+        i += 1
+    return stripped
+
+def _insert_options(argv, options, cmake_opts=[]):
+    '''Insert options before the "--" of argv and append cmake_opts after it.'''
+    if _ARG_SEPARATOR in argv:
+        i = argv.index(_ARG_SEPARATOR)
+        return argv[:i] + options + argv[i:] + cmake_opts
+    return argv + options + ([_ARG_SEPARATOR] + cmake_opts if cmake_opts else [])
+
+def _matrix_label(combination):
+    toolchain, config = combination
+    return f'{toolchain}@{config or "default"}'
+
+# Output lines of the concurrent matrix combinations or domain builds are not interleaved
+_output_lock = threading.Lock()
+
 class Build(Forceable):
 
     def __init__(self):
@@ -167,6 +341,11 @@ class Build(Forceable):
         group.add_argument('--domain', action='append',
                            help='''execute build tool (make or ninja) only for
                            given domain''')
+        group.add_argument('--parallel-domains', action='store_true',
+                           help='''build the domains, all or the given ones, at
+                           the same time as far as their build order allows.
+                           Make builds share a make job server, Ninja builds
+                           each get -j with their share of the CPUs''')
         group.add_argument('-t', '--target',
                            help='''run build system target TARGET
                            (try "-t usage")''')
@@ -191,11 +370,11 @@ class Build(Forceable):
                            Do not use this option with manually specified
                            -DSNIPPET... cmake arguments: the results are
                            undefined''')
-        group.add_argument('--toolchain', dest='toolchain', action='store',
-                           default='armgcc', help='Specify toolchain')
+        group.add_argument('--toolchain', dest='toolchain', action=StoreAndCollect,
+                           default='armgcc', help='Specify toolchain, several with --matrix')
         group.add_argument('--compiler', dest='compiler', action='store', help='Specify compiler. Compiler must follow toolchain.')
-        group.add_argument('--config', dest='config', action='store',
-                           default=None, help='SDK build config type')
+        group.add_argument('--config', dest='config', action=StoreAndCollect,
+                           default=None, help='SDK build config type, several with --matrix')
         group.add_argument('-k', '--kit', action='store', help='Kit id')
         group.add_argument('--shield', action='store', help='')
         group.add_argument('--hint', action='store_true', default=False, help='Execute external assistant command like'
@@ -208,6 +387,16 @@ class Build(Forceable):
                            help='''do not create multi domain build system
                                    (default)''')
 
+        group = parser.add_argument_group('matrix builds', MATRIX_DESCRIPTION)
+        group.add_argument('--matrix', action='store_true',
+                           help='build every --toolchain/--config combination')
+        group.add_argument('--matrix-jobs', type=int, default=0,
+                           help='combinations configured at once, all CPUs by default')
+        group.add_argument('--ccache', action='store_true',
+                           help=f'''compile through ccache if it is installed, shared by
+                           all build dirs. Only for {', '.join(CCACHE_TOOLCHAINS)}''')
+        parser.set_defaults(toolchains=[], configs=[])
+
         group = parser.add_argument_group('pristine builds',
                                           PRISTINE_DESCRIPTION)
         group.add_argument('-p', '--pristine', choices=['auto', 'always',
@@ -219,6 +408,7 @@ class Build(Forceable):
         return parser
 
     def do_run(self, args, remainder):
+        start = time.time()
         self.args = args        # Avoid having to pass them around
         self.config_board = config_get('board', None)
         self.config_device = config_get('device', None)
@@ -251,6 +441,9 @@ class Build(Forceable):
                                                        self.args.cmake_opts),
                 level=log.VERBOSE_EXTREME)
         self._sanity_precheck()
+        if self.args.matrix:
+            self._run_matrix()
+            return
         self._setup_build_dir()
 
         if args.pristine is not None:
@@ -268,6 +461,10 @@ class Build(Forceable):
         log.dbg('pristine: {} auto_pristine: {}'.format(pristine,
                                                         self.auto_pristine),
                 level=log.VERBOSE_VERY)
+        use_manifest = self._build_manifest_applies(pristine)
+        if use_manifest and self._is_up_to_date(start):
+            _append_invocation_log(self.build_dir, _get_full_cmdline())
+            return
         if is_mcux_build(self.build_dir):
             if pristine == 'always':
                 self._run_pristine()
@@ -297,6 +494,149 @@ class Build(Forceable):
         self.domains = load_domains(self.build_dir)
 
         self._run_build(args.target, args.domain)
+        if use_manifest:
+            self._write_build_manifest(time.time() - start)
+
+    def _build_manifest_applies(self, pristine):
+        # Only a plain rebuild of the whole build dir can be skipped, the other
+        # options always run CMake, a target or print the build commands
+        return not (pristine == 'always' or self.args.cmake or self.args.cmake_opts or
+                    self.args.cmake_only or self.args.snippets or self.args.target or
+                    self.args.domain or self.args.dry_run or self.args.test_item)
+
+    def _build_manifest_key(self):
+        argv = sys.argv[1:]
+        if self.name in argv:
+            argv = argv[argv.index(self.name) + 1:]
+        return {
+            'argv': argv,
+            'cwd': pathlib.Path.cwd().as_posix(),
+            'env': {name: os.environ.get(name, '') for name in BUILD_MANIFEST_ENV},
+        }
+
+    def _is_up_to_date(self, start):
+        '''
+        Return True if the inputs of the last build in the build dir did not change and
+        ninja has no work to do.
+        '''
+        manifest = _read_build_manifest(self.build_dir, self._build_manifest_key())
+        if not manifest:
+            return False
+        try:
+            p = subprocess.run([manifest['make_program'], '-C', self.build_dir, '-n'],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError:
+            return False
+        if p.returncode != 0 or b'no work to do' not in p.stdout:
+            return False
+        seconds = time.time() - start
+        self.banner(f'{self.build_dir} is up to date, checked in {seconds:.2f}s, '
+                    f'{max(manifest["seconds"] - seconds, 0):.1f}s saved compared to the last build')
+        return True
+
+    def _write_build_manifest(self, seconds):
+        # Changes to the other inputs of the build, prj.conf fragments and CMake files
+        # included, are found by ninja
+        if not self.cmake_cache or self.cmake_cache.get('CMAKE_GENERATOR') != 'Ninja':
+            return
+        make_program = self.cmake_cache.get('CMAKE_MAKE_PROGRAM')
+        if not make_program:
+            return
+        input_files = [os.path.join(self.source_dir, 'example.yml')]
+        input_files.extend(str(conf_file) for conf_file in pathlib.Path(self.source_dir).glob('*.conf'))
+        _write_build_manifest(self.build_dir, self._build_manifest_key(), input_files, make_program, seconds)
+
+    def _run_matrix(self):
+        toolchains = self.args.toolchains or [self.args.toolchain]
+        configs = self.args.configs or [self.args.config]
+        board, _ = self._find_board()
+        source_dir = self._find_source_dir()
+        app = os.path.split(source_dir)[1]
+        base_build_dir = find_build_dir(self.args.build_dir, board=board,
+                                        source_dir=source_dir, app=app)
+        if not base_build_dir:
+            log.die('Unable to determine a default build folder. Check '
+                    'your build.dir-fmt configuration option')
+
+        # Every combination runs this west build command line, global west options included,
+        # with its own toolchain, config and build dir
+        argv = sys.argv[1:]
+        west_cmd = [sys.executable, '-m', 'west'] + argv[:argv.index(self.name) + 1]
+        build_args = _strip_options(argv[argv.index(self.name) + 1:], MATRIX_OPTIONS)
+        rebuild_args = list(itertools.takewhile(lambda arg: arg != _ARG_SEPARATOR,
+                                                _strip_options(build_args, MATRIX_CMAKE_OPTIONS)))
+
+        env = dict(os.environ)
+        launcher_opts = []
+        if self.args.ccache:
+            if shutil.which('ccache'):
+                # Paths below the SDK root are hashed relative to it, so all the build dirs
+                # share the cached objects
+                env.setdefault('CCACHE_BASEDIR', pathlib.Path(__file__).resolve().parent.parent.parent.as_posix())
+                launcher_opts = ['-DCMAKE_C_COMPILER_LAUNCHER=ccache', '-DCMAKE_CXX_COMPILER_LAUNCHER=ccache']
+            else:
+                log.wrn('ccache is not installed, building without it')
+
+        combinations = list(itertools.product(toolchains, configs))
+        timings = {}
+        jobserver, jobs = get_jobserver(self.args.matrix_jobs)
+        self.banner(f'configuring {len(combinations)} combinations, {min(jobs, len(combinations))} at a time')
+
+        def configure(combination):
+            toolchain, config = combination
+            cmake_opts = launcher_opts if toolchain in CCACHE_TOOLCHAINS else []
+            cmd = west_cmd + _insert_options(build_args, self._matrix_options(base_build_dir, toolchain, config) +
+                                             ['--cmake-only'], cmake_opts)
+            return self._run_prefixed(_matrix_label(combination), cmd, env, jobserver)
+
+        with ThreadPoolExecutor(max_workers=min(jobs, len(combinations))) as executor:
+            for combination, result in zip(combinations, executor.map(configure, combinations)):
+                timings[combination] = {'configure': result}
+
+        if not self.args.cmake_only:
+            for combination in combinations:
+                if timings[combination]['configure'][0] != 0:
+                    continue
+                toolchain, config = combination
+                self.banner(f'building {_matrix_label(combination)}')
+                cmd = west_cmd + rebuild_args + self._matrix_options(base_build_dir, toolchain, config)
+                timings[combination]['build'] = self._run_prefixed(_matrix_label(combination), cmd, env)
+
+        self.banner('matrix summary')
+        failed = []
+        for combination in combinations:
+            status = 'ok'
+            for step in ['configure', 'build']:
+                if step in timings[combination] and timings[combination][step][0] != 0:
+                    status = f'{step} failed'
+                    failed.append(_matrix_label(combination))
+                    break
+            times = '  '.join(f'{step} {timings[combination][step][1]:7.1f}s' for step in ['configure', 'build']
+                              if step in timings[combination])
+            log.inf(f'{_matrix_label(combination):30} {times}  {status}')
+        if failed:
+            log.die(f'{len(failed)} of {len(combinations)} combinations failed: {", ".join(failed)}')
+
+    def _matrix_options(self, base_build_dir, toolchain, config):
+        options = ['--toolchain', toolchain]
+        if config:
+            options.extend(['--config', config])
+        options.extend(['-d', os.path.join(base_build_dir, f'{toolchain}_{config or "default"}')])
+        return options
+
+    def _run_prefixed(self, label, cmd, env, jobserver=None):
+        '''Run cmd with its output prefixed by label, return (returncode, seconds).'''
+        log.dbg(f'[{label}] running', shlex.join(cmd), level=log.VERBOSE_NORMAL)
+        with jobserver.get_job() if jobserver else contextlib.nullcontext():
+            start = time.time()
+            popen = jobserver.popen if jobserver else subprocess.Popen
+            p = popen(cmd, env=dict(env), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            for line in p.stdout:
+                with _output_lock:
+                    sys.stdout.write(f'[{label}] {line.decode(errors="replace").rstrip()}\n')
+                    sys.stdout.flush()
+            returncode = p.wait()
+        return returncode, time.time() - start
 
     def _find_board(self):
         board, origin = None, None
@@ -812,7 +1152,14 @@ class Build(Forceable):
         domains = load_domains(self.build_dir)
         build_dir_list = []
 
-        if domain is None:
+        if self.args.parallel_domains and (domain or not target):
+            self.banner('building domain(s) in parallel: {}'.format(
+                ' '.join(d.name for d in domains.get_build_order(domain))))
+            self._run_domain_builds(domains, domains.get_build_order(domain), extra_args)
+            if domain is None:
+                # Only the sysbuild steps of the top build dir are left to run
+                build_dir_list = [domains.get_top_build_dir()]
+        elif domain is None:
             # If no domain is specified, we just build top build dir as that
             # will build all domains.
             build_dir_list = [domains.get_top_build_dir()]
@@ -829,6 +1176,69 @@ class Build(Forceable):
         if self.cmake_temp_dir and os.path.exists(self.cmake_temp_dir):
             shutil.rmtree(self.cmake_temp_dir)
 
+    def _run_domain_builds(self, domains, domain_list, extra_args):
+        '''Build the domain_list domains concurrently, each once the domains it
+        depends on are built.'''
+        names = [d.name for d in domain_list]
+        dependencies = {d.name: [name for name in domains.get_build_dependencies(d.name) if name in names]
+                        for d in domain_list}
+        if self.args.dry_run:
+            for d in domain_list:
+                run_build(d.build_dir, extra_args=extra_args, dry_run=True)
+            return
+
+        cmake = cmake_command([])
+        jobserver, jobs = get_jobserver()
+        env = dict(os.environ)
+        # Ninja before 1.13 ignores the make job server and runs as many jobs as there are
+        # CPUs, so each Ninja build gets its share of the jobs of the domains built together
+        level = {}
+        for d in domain_list:
+            level[d.name] = 1 + max((level.get(name, 0) for name in dependencies[d.name]), default=0)
+        width = max(list(level.values()).count(value) for value in set(level.values()))
+        ninja_args = ['-j', str(max(1, jobs // width))]
+        results = {}
+        pending = list(domain_list)
+        running = {}
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=len(domain_list)) as executor:
+            while pending or running:
+                if any(returncode != 0 for returncode, _ in results.values()):
+                    # As make does, start nothing new once a build failed
+                    pending = []
+                for d in [d for d in pending if all(name in results for name in dependencies[d.name])]:
+                    pending.remove(d)
+                    cmd = cmake + ['--build', d.build_dir] + \
+                          (ninja_args if self._domain_generator(d) == 'Ninja' else []) + extra_args
+                    running[executor.submit(self._run_prefixed, d.name, cmd, env, jobserver)] = d
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future).name] = future.result()
+
+        failed = []
+        for d in domain_list:
+            if d.name not in results:
+                status = 'not built'
+            elif results[d.name][0] != 0:
+                status = 'failed'
+                failed.append(d.name)
+            else:
+                status = 'ok'
+            seconds = f'{results[d.name][1]:7.1f}s' if d.name in results else ' ' * 8
+            log.inf(f'{d.name:30} {seconds}  {status}')
+        log.inf(f'domains built in {time.time() - start:.1f}s, '
+                f'{sum(result[1] for result in results.values()):.1f}s one after the other')
+        if failed:
+            log.die(f'building domain(s) failed: {", ".join(failed)}')
+
+    def _domain_generator(self, domain):
+        try:
+            return CMakeCache.from_build_dir(domain.build_dir).get('CMAKE_GENERATOR')
+        except FileNotFoundError:
+            return None
+
     def _append_verbose_args(self, extra_args, add_dashes):
         # These hacks are only needed for CMake versions earlier than
         # 3.14. When Zephyr's minimum version is at least that, we can
@@ -851,27 +1261,36 @@ class Build(Forceable):
 
     def _get_default_build_type(self, cmake_opts):
         build_type = 'debug'
+        cmake_opt_dict = {}
+        for opt in cmake_opts:
+            opt = opt[2:]
+            if '=' not in opt:
+                continue
+            k, v = opt.split('=', 1)
+            cmake_opt_dict[k.lower()] = v
+        # The build type only depends on the app, the board/device and toolchain options and
+        # the example.yml files read to resolve them, reuse it while none of them changed
+        cache_key = {k: cmake_opt_dict.get(k, '') for k in DEFAULT_BUILD_TYPE_OPTIONS}
+        cache_key['source_dir'] = pathlib.Path(self.source_dir).as_posix()
+        cached_build_type = _read_default_build_type_cache(cache_key)
+        if cached_build_type:
+            return cached_build_type
         try:
             sys.path.insert(0, script_dir)
             from misc import sdk_project_target
 
-            cmake_opt_dict = {}
-            for opt in cmake_opts:
-                opt = opt[2:]
-                if '=' not in opt:
-                    continue
-                k, v = opt.split('=')
-                cmake_opt_dict[k.lower()] = v
             board_core = cmake_opt_dict.get('board', '')
             if cmake_opt_dict.get('core_id'):
                 board_core = board_core + '@' + cmake_opt_dict['core_id']
             op = sdk_project_target.MCUXRepoProjects()
+            input_files = [os.path.join(self.source_dir, 'example.yml')]
             if cmake_opt_dict.get('sdkrootdirpath', '') not in self.source_dir:
                 # Freestanding example's example.yml is out of tree, need parse it to get the real example.yml location
                 source_example_yml = yaml.safe_load(open(os.path.join(self.source_dir, 'example.yml'), 'r'))
                 _, example_data = next(iter(source_example_yml.items()))
                 repo_source_dir = example_data.get('contents', {}).get('meta_path', '')
                 app_path = os.path.join(cmake_opt_dict.get('sdkrootdirpath', ''), repo_source_dir)
+                input_files.append(app_path if app_path.endswith('example.yml') else os.path.join(app_path, 'example.yml'))
             else:
                 app_path = (pathlib.Path(self.source_dir) / 'example.yml').relative_to(pathlib.Path(cmake_opt_dict.get('sdkrootdirpath', ''))).as_posix()
             matched_cases = op.search_app_targets(
@@ -890,6 +1309,8 @@ class Build(Forceable):
             matched_types.sort()
             # 'debug' takes the highest priority
             build_type = 'debug' if 'debug' in matched_types else matched_types[0]
+            input_files.extend(sdk_project_target.MCUXAppTargets.get_consulted_files())
+            _write_default_build_type_cache(cache_key, input_files, build_type)
         except Exception as _:
             pass
         finally:
@@ -24,6 +24,8 @@ from west.util import escapes_directory
 script_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 sys.path.insert(0, os.path.join(script_dir, "pylib/build_helpers/"))
 from domains import Domains
+# The job server is shared with twister too
+sys.path.insert(0, os.path.join(script_dir, "pylib/twister/"))
 
 DEFAULT_BUILD_DIR = 'build'
 '''Name of the default Zephyr build directory.'''
@@ -180,3 +182,21 @@ flash_order:
 ''')
 
     return Domains.from_file(domains_file)
+
+def get_jobserver(jobs=0):
+    '''Return a (jobserver, jobs) pair limiting the number of concurrent jobs.
+
+    The GNU make job server of a calling make is joined if there is one and
+    jobs is not given, otherwise a new job server with jobs slots (all CPUs by
+    default) is created, like twister does. The job server only works on
+    Linux, elsewhere jobserver is None and the caller only limits its own
+    workers to jobs.
+    '''
+    if sys.platform != 'linux':
+        return None, jobs or os.cpu_count() or 1
+    # Imported here, the module needs fcntl
+    from twisterlib.jobserver import GNUMakeJobClient, GNUMakeJobServer
+    jobserver = GNUMakeJobClient.from_environ(jobs=jobs)
+    if not jobserver:
+        jobserver = GNUMakeJobServer(jobs)
+    return jobserver, jobserver.jobs or jobs or os.cpu_count() or 1
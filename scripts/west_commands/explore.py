@@ -2,29 +2,76 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 from west.commands import WestCommand
+import argparse
 import os
 import os.path
-from textwrap import dedent
+from textwrap import dedent, fill
 import sys
 import pathlib
+import contextlib
 
 sys.path.append(f'{pathlib.Path(__file__).parent.resolve()}/../mcuxsdk_explore/commands')
 import explore_command as e
+import query_command as q
 
 class McuxsdkExplore(WestCommand):
     def __init__(self):
         super().__init__(
             name='explore',
             help='Interactive visualization of MCUXpresso SDK data.',
-            description=dedent('''Visualization of MCUXpresso SDK data and build command selection.'''))
+            description=dedent('''\
+            Visualization of MCUXpresso SDK data and build command selection.
+
+            With --query the database is queried without the GUI, for example all
+            build commands of a board and toolchain:
+
+                west explore --query -f board_name=frdmk64f -f toolchain=armgcc
+
+            Filter values of the same column are alternatives, filters of different
+            columns must all match. Columns:
+            ''') + fill(', '.join(q.query_columns()), initial_indent='  ', subsequent_indent='  '))
 
     def do_add_parser(self, parser_adder):
         parser = parser_adder.add_parser(self.name,
                                  help=self.help,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter,
                                  description=self.description)
+        parser.add_argument('--refresh', action='store_true', default=False,
+                            help='Update the database with the boards, devices and examples changed since it was built.')
+        parser.add_argument('--query', action='store_true', default=False,
+                            help='Print the matching rows instead of starting the GUI.')
+        parser.add_argument('-f', '--filter', action='append', default=[], metavar='COLUMN=VALUE[,VALUE...]',
+                            help='Only rows with one of the values in COLUMN, may be repeated.')
+        parser.add_argument('--columns', default=','.join(q.DEFAULT_QUERY_COLUMNS),
+                            help='Comma separated columns to print, distinct values only. Default: %(default)s.')
+        parser.add_argument('--format', choices=q.QUERY_FORMATS, default='json',
+                            help='Output format of the query. Default: %(default)s.')
+        parser.add_argument('--count-only', action='store_true', default=False,
+                            help='Print only the number of matching rows.')
         return parser
 
     def do_run(self, args, unknown):
         west_topdir = os.path.realpath(self.topdir).replace('\\','/')
         core_root_path = west_topdir + '/mcuxsdk'
-        e.RunExplorer(self.manifest.repo_abspath, core_root_path)
+        if args.query:
+            self.run_query(args, core_root_path)
+            return
+        if args.filter or args.count_only:
+            self.die('--filter and --count-only require --query')
+        e.RunExplorer(self.manifest.repo_abspath, core_root_path, refresh=args.refresh)
+
+    def run_query(self, args, core_root_path):
+        try:
+            request = q.parse_filters(args.filter)
+        except ValueError as err:
+            self.die(str(err))
+        columns = [column.strip() for column in args.columns.split(',') if column.strip()]
+        # Fail before a missing database is built
+        unknown = [column for column in list(request) + columns if column not in q.query_columns()]
+        if unknown:
+            self.die(f'Unknown columns {", ".join(unknown)}, expected any of {", ".join(q.query_columns())}')
+
+        # Database build and refresh messages must not mix with the query output
+        with contextlib.redirect_stdout(sys.stderr):
+            explorer = e.RunExplorer(self.manifest.repo_abspath, core_root_path, refresh=args.refresh, gui=False)
+        q.run_query(explorer.database_sql, request, columns, args.format, args.count_only)
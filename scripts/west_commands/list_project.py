@@ -3,10 +3,12 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 from west.commands import WestCommand, Verbosity
+import argparse
 import re
 import os
 import sys
 import logging
+import itertools
 from west.configuration import config
 
 script_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)))
@@ -48,12 +50,49 @@ Filter String format
 
 Output Format
 - Output the matched projects into json/yaml file if files ends with .json or .yml
+- Output the matched projects into json lines file if files ends with .jsonl, one project per line
+- Projects are written and listed as soon as they are found, so consumers can start before the search is done
 - Output the matched projects into robot framework file if files ends with .robot
     - In visual studio code, install the plugin "Robot Framework Language Server"
       to get the syntax highlight and interactive test case run feature
 
+Example Index
+- Parsed example.yml files are cached in an index under ~/.cache/mcuxsdk, only
+  example.yml files changed since the last run are parsed again
+- Use --rebuild-index to rebuild the index from scratch, --no-index to bypass it
+- "west config list_project.index false" disables it, "west config list_project.index_file <file>"
+  changes its location
+
+Changed Targets
+- --since <rev> only lists the targets affected by the files changed since the git revision,
+  including uncommitted and untracked files:
+    west list_project -p examples --since origin/main -o affected.jsonl
+- A target is affected if its app dir, its board/device specific app dir or one of the shared
+  example.yml files its targets are inherited from changed:
+    examples/_boards/<board>/example.yml, examples/_boards/<board>/<category>/example.yml,
+    examples/<category>/example.yml
+- Any change of the internal target data affects all targets
+
+Sharding
+- --shard N/M only lists the N-th of M balanced shards of the matched targets, so M build
+  workers can each run the same command with their own N:
+    west list_project -p examples --shard 2/8 --shard-by app --build-weights durations.json -o shard.json
+- --shard-by app keeps all targets of an app dir in one shard for CMake/ccache locality,
+  board and toolchain group by board@core and toolchain, weight balances single targets
+- --build-weights is a json file of historical build durations keyed by build_cmd, unknown
+  targets weigh the average duration. Without it every target weighs the same
+
 '''.format(sdk_project_target.MCUXAppTargets.config_filter.__doc__)
 
+def shard_type(value):
+    try:
+        shard_index, shard_count = [int(item) for item in value.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid shard {value}, expected N/M')
+    if not 1 <= shard_index <= shard_count:
+        raise argparse.ArgumentTypeError(f'invalid shard {value}, N must be in 1..M')
+    return shard_index, shard_count
+
 def config_get(option, fallback):
     return config.get('list_project', option, fallback=fallback)
 
@@ -86,50 +125,81 @@ class ListProject(WestCommand):
                                                     help='Targets to build, the default value is release. e.g, -c release debug')
         parser.add_argument('-l', '--list_format',  action='store', choices=['none', 'cmd', 'silent_cmd'], default=None,
                                                     help='List format for matched projects.')
-        parser.add_argument('-o', '--output_file',  action='store', default=None, help='Output file name. Must ends with .yml or .json')
+        parser.add_argument('-o', '--output_file',  action='store', default=None, help='Output file name. Must ends with .yml, .json, .jsonl or .robot. The file is written while the projects are found.')
         parser.add_argument(      '--cmake_invoke', action='store_true', default=False, help='If invoked by cmake, the target field will be ignored so that all available targets will be printed out.')
         parser.add_argument('--pick_one_target',    action='store_true', default=False, help='Default False, if set, only pick one target for one project and skip others')
         parser.add_argument('-v', '--verbose',      action='store_true', default=False, help='Level of logs. Default is INFO. -v means DEBUG')
         parser.add_argument('--validate',           action='store_true', default=False, help='Validate example.yml')
+        parser.add_argument('--validate-report',    action='store', default=None, metavar='FILE',
+                                                    help='Validate example.yml and write the errors to a json file as {"files": N, "errors": [{"file", "pointer", "message"}]}.')
+        parser.add_argument('-j', '--jobs',         type=int, default=1,
+                                                    help='Number of processes to parse example.yml files. Default is 1, 0 means the number of CPUs. The output is the same as the serial mode.')
+        parser.add_argument('--rebuild-index',      action='store_true', default=False,
+                                                    help='Discard the example.yml index and parse all example.yml files again.')
+        parser.add_argument('--no-index',           action='store_true', default=False,
+                                                    help='Do not use the example.yml index, always parse all example.yml files.')
+        parser.add_argument('--shard',              type=shard_type, default=None, metavar='N/M',
+                                                    help='Only list the N-th (1-based) of M shards of the matched targets with near-equal build time.')
+        parser.add_argument('--shard-by',           choices=sdk_project_target.MCUXRepoProjects.SHARD_BY, default='app',
+                                                    help='Group the targets of a shard by app dir, board, toolchain, or not at all with weight. Default is app.')
+        parser.add_argument('--build-weights',      action='store', default=None, metavar='FILE',
+                                                    help='Json file of build durations keyed by build_cmd, used to balance the shards.')
+        parser.add_argument('--since',              action='store', default=None, metavar='REV',
+                                                    help='Only list the targets affected by the files changed since the git revision, e.g. --since origin/main')
 
         return parser
 
     def do_run(self, args, unknow) -> None:
         mcux_log_init(logging.DEBUG if args.verbose else logging.INFO)
+        mcux_debug(f'YAML backend: {mcux_yaml_backend()}')
         sdk_project_target.MCUXAppTargets.config_internal_data()
+        if not args.no_index and config_getboolean('index', True):
+            sdk_project_target.MCUXAppTargets.config_example_index(
+                index_file=config_get('index_file', None),
+                rebuild=args.rebuild_index
+            )
         # Search for the testcase
         op = sdk_project_target.MCUXRepoProjects()
         output_format = args.list_format or config_get('list_format', 'cmd')
-        is_validate_example_yml = args.validate or config_getboolean('validate', False)
-        match_cases = []
+        is_validate_example_yml = args.validate or bool(args.validate_report) or config_getboolean('validate', False)
         app_paths = args.app_path 
         if not app_paths:
             app_paths = [os.getcwd()]
             print("No app_path given, will recursively search current directory, it may take a long time... ")
-        for app_path in app_paths:
-            match_cases.extend(
-                op.search_app_targets(
-                    app_path=app_path,
-                    board_cores_filter=args.board,
-                    shields_filter=args.shield,
-                    devices_filter=args.device,
-                    toolchains_filter=args.toolchain,
-                    targets_filter=args.config if not args.cmake_invoke else [],
-                    is_pick_one_target_for_app=args.pick_one_target,
-                    validate=is_validate_example_yml
-                )
-            )
-        # Export data when necessary
-        if args.output_file:
-            op.dump_to_file(args.output_file, match_cases)
-
-        # List the output
-        if output_format == 'silent_cmd':
-            op.silent_print_apps(match_cases)
-        elif output_format == 'cmd':
-            op.pretty_print_apps(match_cases)
-        elif output_format == 'none':
-            pass
+        if args.since:
+            self._config_change_set(args.since, app_paths)
+        apps = itertools.chain.from_iterable(
+            op.iter_app_targets(
+                app_path=app_path,
+                board_cores_filter=args.board,
+                shields_filter=args.shield,
+                devices_filter=args.device,
+                toolchains_filter=args.toolchain,
+                targets_filter=args.config if not args.cmake_invoke else [],
+                is_pick_one_target_for_app=args.pick_one_target,
+                validate=is_validate_example_yml,
+                jobs=args.jobs
+            ) for app_path in app_paths
+        )
+        if args.shard:
+            # Balancing needs all the matched cases, the shard is exported once complete
+            build_weights = None
+            if args.build_weights and (build_weights := mcux_read_json(args.build_weights)) is None:
+                mcux_error(f'Build weights file {args.build_weights} not found')
+                exit(-1)
+            apps = op.shard_apps(list(apps), *args.shard, shard_by=args.shard_by, build_weights=build_weights)
+        # Export and list the matched cases as soon as they are found, only keep them when needed
+        match_cases = []
+        for app in op.stream_apps(apps, export_file=args.output_file, list_format=output_format):
+            if args.cmake_invoke:
+                match_cases.append(app)
+        sdk_project_target.MCUXAppTargets.save_example_index()
+        mcux_debug(f'YAML cache: {mcux_yaml_cache_info()}')
+        if is_validate_example_yml:
+            validation_report = sdk_project_target.MCUXAppTargets.VALIDATION_REPORT
+            mcux_info(f"Validated {validation_report['files']} example.yml files, {len(validation_report['errors'])} errors")
+            if args.validate_report:
+                mcux_write_json(args.validate_report, validation_report, is_create_dir=True)
 
         # Return the matched cases
         if args.cmake_invoke:
@@ -141,3 +211,17 @@ class ListProject(WestCommand):
                 mcux_banner(f'End of Project Target Report')
                 exit(-1)
         exit(0)
+
+    def _config_change_set(self, rev, app_paths):
+        # Look in every repository an app or its shared target data may live in
+        search_dirs = [os.path.join(sdk_root_dir, 'examples'), os.path.join(sdk_root_dir, sdk_project_target.INTERNAL_MODULE_PATH)]
+        for app_path in app_paths:
+            app_dir = os.path.join(sdk_root_dir, app_path)
+            search_dirs.append(os.path.dirname(app_dir) if app_path.endswith('example.yml') else app_dir)
+        try:
+            change_set = sdk_project_target.MCUXChangeSet.from_git(rev, search_dirs)
+        except RuntimeError as e:
+            mcux_error(str(e))
+            exit(-1)
+        mcux_debug(f'{len(change_set.changed_files)} files changed since {rev}')
+        sdk_project_target.MCUXAppTargets.CHANGE_SET = change_set
@@ -10,7 +10,6 @@ building Zephyr applications needed by multiple commands.
 See build.py for the build command itself.
 '''
 
-from collections import OrderedDict
 import os.path
 import re
 import subprocess
@@ -21,6 +20,11 @@ import packaging.version
 from west import log
 from west.util import quote_sh_list
 
+# The parsed CMake caches are shared with twister
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+                                'pylib/twister'))
+from twisterlib.cmakecache import parse_cache_file
+
 DEFAULT_CACHE = 'CMakeCache.txt'
 
 DEFAULT_CMAKE_GENERATOR = 'Ninja'
@@ -40,12 +44,7 @@ def run_cmake(args, cwd=None, capture_output=False, dry_run=False):
 
     If capture_output is set to True, returns the output of the command instead
     of displaying it on stdout/stderr..'''
-    cmake = shutil.which('cmake')
-    if cmake is None and not dry_run:
-        log.die('CMake is not installed or cannot be found; cannot build.')
-    _ensure_min_version(cmake, dry_run)
-
-    cmd = [cmake] + args
+    cmd = cmake_command(args, dry_run=dry_run)
 
     kwargs = dict()
     if capture_output:
@@ -74,6 +73,21 @@ def run_cmake(args, cwd=None, capture_output=False, dry_run=False):
         raise subprocess.CalledProcessError(p.returncode, p.args)
 
 
+def cmake_command(args, dry_run=False):
+    '''Return the command line running cmake with args, for callers
+    which start the process themselves.
+
+    :param args: arguments to pass to CMake
+    :param dry_run: the command will not be run, don't require CMake
+    '''
+    cmake = shutil.which('cmake')
+    if cmake is None and not dry_run:
+        log.die('CMake is not installed or cannot be found; cannot build.')
+    _ensure_min_version(cmake, dry_run)
+
+    return [cmake] + args
+
+
 def run_build(build_directory, **kwargs):
     '''Run cmake in build tool mode.
 
@@ -220,13 +234,8 @@ class CMakeCache:
         self.load(cache_file)
 
     def load(self, cache_file):
-        entries = []
-        with open(cache_file, 'r', encoding="utf-8") as cache:
-            for line_no, line in enumerate(cache):
-                entry = CMakeCacheEntry.from_line(line, line_no)
-                if entry:
-                    entries.append(entry)
-        self._entries = OrderedDict((e.name, e) for e in entries)
+        self._entries = parse_cache_file(cache_file, CMakeCacheEntry.from_line,
+                                         encoding="utf-8")
 
     def get(self, name, default=None):
         entry = self._entries.get(name)